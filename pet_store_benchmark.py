@@ -0,0 +1,233 @@
+#!/usr/bin/env python3
+"""
+Pet Store MCP Benchmark
+=======================
+
+Times the prompt-to-response pipeline of the AIOrchestrator end to end against the
+mock backend, with each stage measured separately:
+
+- route:   resolving the prompt to an intent
+- backend: the MockPetStoreMCPClient call(s)
+- format:  rendering the emoji response text
+
+Runs every combination of catalog size and prompt mix, reports p50/p95/p99 latency
+and throughput, and can save results as a baseline JSON or compare against one to
+catch regressions.
+
+Usage:
+    python pet_store_benchmark.py --sizes 1000,10000,100000 --save-baseline baseline.json
+    python pet_store_benchmark.py --sizes 1000,10000,100000 --baseline baseline.json
+"""
+
+import argparse
+import json
+import random
+import sys
+import time
+from typing import Any, Dict, List
+
+from pet_store_common import percentile
+from pet_store_demo_mock import AIOrchestrator, MockPetStoreMCPClient, PetStoreDemoApp, generate_mock_pets
+
+STAGES = ("route", "backend", "format", "total")
+
+# Prompt templates per mix; {id} is replaced with a random pet ID from the catalog
+PROMPT_MIXES = {
+    "predefined": PetStoreDemoApp().predefined_prompts,
+    "lookups": [
+        "Find me pet with ID {id}",
+        "Tell me about pet number {id}",
+        "Show me pet {id}"
+    ],
+    "lists": [
+        "What pets are available for adoption?",
+        "Which pets are currently pending adoption?",
+        "Show me all sold pets"
+    ],
+    "mixed": [
+        "Find me pet with ID {id}",
+        "Tell me about pet number {id}",
+        "Which pets are currently pending adoption?",
+        "What cats do you have?",
+        "Hello there!"
+    ]
+}
+
+def summarize(samples_ns: List[int]) -> Dict[str, float]:
+    """Summarize nanosecond samples as millisecond statistics"""
+    values = sorted(sample / 1e6 for sample in samples_ns)
+    return {
+        "count": len(values),
+        "mean_ms": sum(values) / len(values) if values else 0.0,
+        "p50_ms": percentile(values, 0.50),
+        "p95_ms": percentile(values, 0.95),
+        "p99_ms": percentile(values, 0.99),
+        "max_ms": values[-1] if values else 0.0
+    }
+
+def build_prompts(mix: str, count: int, max_id: int, rng: random.Random) -> List[str]:
+    """Expand a prompt mix into ``count`` concrete prompts"""
+    templates = PROMPT_MIXES[mix]
+    return [templates[i % len(templates)].format(id=rng.randint(1, max_id)) for i in range(count)]
+
+def run_case(orchestrator: AIOrchestrator, prompts: List[str], warmup: int) -> Dict[str, Any]:
+    """Run prompts through the orchestrator, timing each stage"""
+    for prompt in prompts[:warmup]:
+        orchestrator.process_prompt(prompt)
+    
+    samples = {stage: [] for stage in STAGES}
+    clock = time.perf_counter_ns
+    started = clock()
+    for prompt in prompts:
+        t0 = clock()
+        intent, pet_id = orchestrator.route(prompt)
+        t1 = clock()
+        data = orchestrator.fetch(intent, pet_id)
+        t2 = clock()
+        orchestrator.render(intent, data, prompt, pet_id)
+        t3 = clock()
+        samples["route"].append(t1 - t0)
+        samples["backend"].append(t2 - t1)
+        samples["format"].append(t3 - t2)
+        samples["total"].append(t3 - t0)
+    elapsed = (clock() - started) / 1e9
+    
+    result = {stage: summarize(values) for stage, values in samples.items()}
+    result["throughput_per_s"] = len(prompts) / elapsed if elapsed else 0.0
+    return result
+
+def run_benchmarks(sizes: List[int], mixes: List[str], iterations: int, warmup: int, seed: int) -> Dict[str, Any]:
+    """Run every size/mix combination and return results keyed by "size/mix" """
+    results = {}
+    for size in sizes:
+        client = MockPetStoreMCPClient("mock://benchmark")
+        client.load_synthetic_pets(size, seed=seed)
+        orchestrator = AIOrchestrator(client)
+        max_id = client.pet_count()
+        for mix in mixes:
+            prompts = build_prompts(mix, iterations, max_id, random.Random(seed))
+            results[f"{size}/{mix}"] = run_case(orchestrator, prompts, warmup)
+    return results
+
+def formatter_scaling(sizes: List[int], repeat: int, seed: int) -> List[Dict[str, float]]:
+    """Time the list formatter on growing catalogs; a flat ns/pet figure means linear scaling"""
+    orchestrator = AIOrchestrator(None)
+    pets = list(generate_mock_pets(max(sizes), seed=seed))
+    rows = []
+    for size in sizes:
+        subset = pets[:size]
+        best = None
+        for _ in range(repeat):
+            started = time.perf_counter_ns()
+            orchestrator._format_pets_response(subset, "🐾 Here are all the pets in our store:")
+            elapsed = time.perf_counter_ns() - started
+            best = elapsed if best is None else min(best, elapsed)
+        rows.append({"size": size, "total_ms": best / 1e6, "ns_per_pet": best / size})
+    return rows
+
+def print_scaling(rows: List[Dict[str, float]]) -> None:
+    """Print formatter cost per pet relative to the smallest catalog"""
+    print(f"{'pets':>10} {'total ms':>12} {'ns/pet':>10} {'vs smallest':>12}")
+    print("-" * 47)
+    for row in rows:
+        print(f"{row['size']:>10,} {row['total_ms']:>12.2f} {row['ns_per_pet']:>10.0f} "
+              f"{row['ns_per_pet'] / rows[0]['ns_per_pet']:>11.2f}x")
+
+def print_results(results: Dict[str, Any]) -> None:
+    """Print a table of per-stage latency percentiles"""
+    print(f"{'case':<24} {'stage':<8} {'p50 ms':>10} {'p95 ms':>10} {'p99 ms':>10} {'ops/s':>10}")
+    print("-" * 77)
+    for case, result in results.items():
+        for stage in STAGES:
+            stats = result[stage]
+            throughput = f"{result['throughput_per_s']:>10.1f}" if stage == "total" else ""
+            print(f"{case:<24} {stage:<8} {stats['p50_ms']:>10.3f} {stats['p95_ms']:>10.3f} "
+                  f"{stats['p99_ms']:>10.3f} {throughput}")
+
+def compare(results: Dict[str, Any], baseline: Dict[str, Any], tolerance: float,
+            min_delta_ms: float = 0.05, min_samples: int = 20) -> List[str]:
+    """Return a description of every stage whose p50 or p95 regressed beyond tolerance
+    
+    Sub-millisecond stages are dominated by timer and scheduler noise, so a slowdown must also
+    exceed ``min_delta_ms`` in absolute terms, and stages with fewer than ``min_samples``
+    samples on either side are not compared at all.
+    """
+    regressions = []
+    for case, result in results.items():
+        if case not in baseline:
+            continue
+        for stage in STAGES:
+            if min(baseline[case][stage]["count"], result[stage]["count"]) < min_samples:
+                continue
+            for metric in ("p50_ms", "p95_ms"):
+                before = baseline[case][stage][metric]
+                after = result[stage][metric]
+                if before > 0 and after > before * (1 + tolerance) and after - before > min_delta_ms:
+                    regressions.append(f"{case} {stage} {metric}: {before:.3f} -> {after:.3f} "
+                                       f"(+{(after / before - 1):.0%})")
+    return regressions
+
+def parse_args(argv: List[str] = None) -> argparse.Namespace:
+    """Parse command line arguments"""
+    parser = argparse.ArgumentParser(description="Pet Store MCP prompt pipeline benchmark")
+    parser.add_argument("--sizes", default="1000,10000",
+                        help="comma separated catalog sizes (default: 1000,10000)")
+    parser.add_argument("--mixes", default=",".join(PROMPT_MIXES),
+                        help=f"comma separated prompt mixes (default: {','.join(PROMPT_MIXES)})")
+    parser.add_argument("--iterations", type=int, default=200, help="prompts per case (default: 200)")
+    parser.add_argument("--warmup", type=int, default=10, help="untimed warmup prompts per case (default: 10)")
+    parser.add_argument("--seed", type=int, default=42, help="seed for catalog and prompts (default: 42)")
+    parser.add_argument("--output", help="write results as JSON to this file")
+    parser.add_argument("--save-baseline", help="write results as a baseline JSON to this file")
+    parser.add_argument("--baseline", help="compare against a baseline JSON and fail on regressions")
+    parser.add_argument("--formatter-scaling", action="store_true",
+                        help="only measure list formatter cost per pet across --sizes")
+    parser.add_argument("--tolerance", type=float, default=0.20,
+                        help="allowed slowdown before a regression is reported (default: 0.20)")
+    parser.add_argument("--min-delta-ms", type=float, default=0.05,
+                        help="ignore slowdowns smaller than this many milliseconds (default: 0.05)")
+    return parser.parse_args(argv)
+
+def main():
+    """Main entry point"""
+    args = parse_args()
+    sizes = [int(size) for size in args.sizes.split(",")]
+    mixes = args.mixes.split(",")
+    unknown = [mix for mix in mixes if mix not in PROMPT_MIXES]
+    if unknown:
+        print(f"❌ Unknown prompt mix: {', '.join(unknown)}")
+        sys.exit(2)
+    
+    if args.formatter_scaling:
+        print(f"⏱️  Measuring list formatter scaling for sizes {sizes} (best of 5)")
+        print()
+        rows = formatter_scaling(sizes, repeat=5, seed=args.seed)
+        print_scaling(rows)
+        if args.output:
+            with open(args.output, "w", encoding="utf-8") as f:
+                json.dump({"formatter_scaling": rows}, f, indent=2)
+        return
+    
+    print(f"⏱️  Benchmarking sizes {sizes} with mixes {mixes} ({args.iterations} prompts per case)")
+    print()
+    results = run_benchmarks(sizes, mixes, args.iterations, args.warmup, args.seed)
+    print_results(results)
+    
+    for path in filter(None, (args.output, args.save_baseline)):
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+        print(f"\n💾 Results written to {path}")
+    
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline, args.tolerance, args.min_delta_ms)
+        if regressions:
+            print(f"\n❌ {len(regressions)} regression(s) beyond {args.tolerance:.0%}:")
+            for regression in regressions:
+                print(f"   • {regression}")
+            sys.exit(1)
+        print(f"\n✅ No regressions beyond {args.tolerance:.0%} against {args.baseline}")
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
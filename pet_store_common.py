@@ -0,0 +1,765 @@
+"""
+Pet Store MCP Demo Common Code
+==============================
+
+Backend-independent pieces shared by pet_store_demo.py, pet_store_demo_mock.py and
+pet_store_benchmark.py: latency recording, tracing helpers, prompt routing, the AI
+orchestrator with its response formatting, and the prompt-processing application loop.
+
+Only the standard library is required; OpenTelemetry is optional and only used for tracing.
+"""
+
+import json
+import logging
+import re
+import sys
+import threading
+import time
+from concurrent.futures import ALL_COMPLETED, FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from contextlib import contextmanager, nullcontext
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+try:
+    from opentelemetry import trace as otel_trace
+except ImportError:  # Optional dependency, only needed for --trace
+    otel_trace = None
+
+logger = logging.getLogger(__name__)
+
+def percentile(sorted_values: List[float], fraction: float) -> float:
+    """Nearest-rank percentile of an already sorted list (0.0 when it is empty)"""
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, max(0, int(round(fraction * len(sorted_values) + 0.5)) - 1))
+    return sorted_values[index]
+
+class LatencyRecorder:
+    """Thread-safe collector of per-stage latency samples
+    
+    Stages are free-form names such as ``route``, ``backend.get_pets`` or ``http.ttfb``.
+    Samples are kept in memory and summarised as count/mean/percentiles on demand.
+    """
+    
+    def __init__(self):
+        self._samples: Dict[str, List[float]] = {}
+        self._lock = threading.Lock()
+    
+    def record(self, stage: str, seconds: float) -> None:
+        """Add one duration sample for a stage"""
+        with self._lock:
+            self._samples.setdefault(stage, []).append(seconds)
+    
+    @contextmanager
+    def time(self, stage: str) -> Iterator[None]:
+        """Record the wall time of the enclosed block under a stage"""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(stage, time.perf_counter() - started)
+    
+    def summary(self) -> Dict[str, Dict[str, float]]:
+        """Return millisecond statistics per stage, ordered by stage name"""
+        with self._lock:
+            samples = {stage: sorted(values) for stage, values in sorted(self._samples.items())}
+        return {
+            stage: {
+                "count": len(values),
+                "total_ms": sum(values) * 1000,
+                "mean_ms": sum(values) / len(values) * 1000,
+                "p50_ms": percentile(values, 0.50) * 1000,
+                "p95_ms": percentile(values, 0.95) * 1000,
+                "p99_ms": percentile(values, 0.99) * 1000,
+                "max_ms": values[-1] * 1000
+            }
+            for stage, values in samples.items()
+        }
+    
+    def format_table(self) -> str:
+        """Render the summary as a fixed-width text table"""
+        lines = [f"{'stage':<32} {'count':>7} {'mean ms':>9} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'max ms':>9}",
+                 "-" * 90]
+        for stage, stats in self.summary().items():
+            lines.append(f"{stage:<32} {stats['count']:>7} {stats['mean_ms']:>9.3f} {stats['p50_ms']:>9.3f} "
+                         f"{stats['p95_ms']:>9.3f} {stats['p99_ms']:>9.3f} {stats['max_ms']:>9.3f}")
+        return "\n".join(lines)
+    
+    def export_json(self, path: str) -> None:
+        """Write the summary to a JSON file"""
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.summary(), f, indent=2)
+
+def _timed(recorder: Optional[LatencyRecorder], stage: str):
+    """Time a block under ``stage`` when a recorder is attached, otherwise do nothing"""
+    return recorder.time(stage) if recorder is not None else nullcontext()
+
+class _NoOpSpan:
+    """Stand-in span used when tracing is disabled or OpenTelemetry is not installed"""
+    
+    def set_attribute(self, key: str, value: Any) -> None:
+        pass
+    
+    def set_attributes(self, attributes: Dict[str, Any]) -> None:
+        pass
+
+_NOOP_SPAN = _NoOpSpan()
+
+def _span(tracer: Any, name: str, attributes: Dict[str, Any] = None, client: bool = False):
+    """Start ``name`` as the current span when a tracer is attached, otherwise yield a no-op span
+    
+    Attributes whose value is None are dropped, since OpenTelemetry rejects them. Client spans
+    mark outgoing HTTP calls so backends can show them as the caller of their server spans.
+    """
+    if tracer is None:
+        return nullcontext(_NOOP_SPAN)
+    kind = otel_trace.SpanKind.CLIENT if client else otel_trace.SpanKind.INTERNAL
+    return tracer.start_as_current_span(
+        name, kind=kind, attributes={key: value for key, value in (attributes or {}).items() if value is not None})
+
+def _result_attributes(data: Any) -> Dict[str, Any]:
+    """Span attributes describing a backend result: item count, or the error message"""
+    if isinstance(data, dict) and "error" in data:
+        return {"pet_store.error": str(data["error"])}
+    if isinstance(data, list):
+        return {"pet_store.item_count": len(data)}
+    return {"pet_store.item_count": 0 if data is None else 1}
+
+def configure_tracing(exporter: str, target: str = None, service_name: str = "pet-store-demo") -> Tuple[Any, Any]:
+    """Install an OpenTelemetry tracer provider and return ``(tracer, provider)``
+    
+    ``exporter`` is "otlp" (OTLP over HTTP, ``target`` overriding the default
+    http://localhost:4318/v1/traces collector endpoint) or "file" (one JSON span per line
+    appended to ``target``). Call ``provider.shutdown()`` before exiting to flush spans.
+    """
+    if otel_trace is None:
+        raise ImportError("Tracing requires OpenTelemetry: pip install opentelemetry-sdk opentelemetry-exporter-otlp")
+    from opentelemetry.sdk.resources import Resource
+    from opentelemetry.sdk.trace import TracerProvider
+    from opentelemetry.sdk.trace.export import BatchSpanProcessor, ConsoleSpanExporter
+    
+    if exporter == "otlp":
+        from opentelemetry.exporter.otlp.proto.http.trace_exporter import OTLPSpanExporter
+        span_exporter = OTLPSpanExporter(endpoint=target) if target else OTLPSpanExporter()
+    elif exporter == "file":
+        output = open(target or "pet_store_traces.jsonl", "a", encoding="utf-8")
+        span_exporter = ConsoleSpanExporter(out=output, formatter=lambda span: span.to_json(indent=None) + "\n")
+    else:
+        raise ValueError(f"Unknown trace exporter: {exporter}")
+    
+    provider = TracerProvider(resource=Resource.create({"service.name": service_name}))
+    provider.add_span_processor(BatchSpanProcessor(span_exporter))
+    otel_trace.set_tracer_provider(provider)
+    return provider.get_tracer(__name__), provider
+
+def filter_pets(pets: Iterable[Dict[str, Any]], status: str = None,
+                category: str = None) -> Iterator[Dict[str, Any]]:
+    """Lazily keep pets matching every given predicate in a single pass
+    
+    Batch mode uses it to answer status/category listings from an already fetched catalog,
+    and the HTTP clients as a fallback for servers that ignore filter query parameters;
+    applying it to an already filtered response is a no-op, so it is always safe to run.
+    """
+    category = category.lower() if category is not None else None
+    for pet in pets:
+        if status is not None and pet.get('status') != status:
+            continue
+        if category is not None and (pet.get('category') or {}).get('name', '').lower() != category:
+            continue
+        yield pet
+
+class IntentRouter:
+    """Resolves prompts to intents with a single precompiled regex scan
+    
+    The routing table is a list of ``(intent, groups)`` rules checked in priority order.
+    Each group is a tuple of keywords and a rule matches when every group has at least one
+    keyword in the prompt (case-insensitive substring match). ``PET_ID`` stands for a
+    number anywhere in the prompt; the first number found is returned as the pet ID.
+    """
+    
+    PET_ID = "<pet id>"
+    
+    def __init__(self, table: List[Tuple[str, List[Tuple[str, ...]]]], default: str = "general"):
+        self.default = default
+        # One bit per (rule, group): a keyword carries the bits of every group it satisfies
+        # and a rule matches when all of its group bits are present
+        bits: Dict[str, int] = {}
+        self._rules: List[Tuple[str, int]] = []
+        bit = 1
+        for intent, groups in table:
+            required = 0
+            for group in groups:
+                for keyword in group:
+                    keyword = keyword if keyword == self.PET_ID else keyword.lower()
+                    bits[keyword] = bits.get(keyword, 0) | bit
+                required |= bit
+                bit <<= 1
+            self._rules.append((intent, required))
+        
+        self._pet_id_bits = bits.pop(self.PET_ID, 0)
+        keywords = list(bits)
+        # Only the first alternative is reported at each position, so a keyword also carries
+        # the bits of any shorter keyword that is a prefix of it
+        self._bits = {keyword: bits[keyword] | self._prefix_bits(keyword, bits) for keyword in keywords}
+        # Keywords are factored into a trie-shaped regex so each position only explores the
+        # branch for its next character, and a zero-width lookahead is tried at every
+        # position so overlapping keywords (e.g. "all pets" and "pet") are all seen in one pass
+        trie: Dict[str, Any] = {}
+        for keyword in keywords:
+            node = trie
+            for char in keyword:
+                node = node.setdefault(char, {})
+            node[""] = {}
+        self._pattern = re.compile(f"(?=({self._trie_regex(trie)}|\\d+))")
+    
+    @classmethod
+    def _trie_regex(cls, node: Dict[str, Any]) -> str:
+        """Render a character trie as a regex preferring the longest keyword"""
+        branches = [re.escape(char) + cls._trie_regex(child) for char, child in node.items() if char]
+        if not branches:
+            return ""
+        if len(branches) == 1 and "" not in node:
+            return branches[0]
+        group = "(?:" + "|".join(branches) + ")"
+        return group + "?" if "" in node else group
+    
+    @staticmethod
+    def _prefix_bits(keyword: str, bits: Dict[str, int]) -> int:
+        implied = 0
+        for other, other_bits in bits.items():
+            if other != keyword and keyword.startswith(other):
+                implied |= other_bits
+        return implied
+    
+    def route(self, prompt: str) -> Tuple[str, Optional[int]]:
+        """Return the first matching intent and the first number in the prompt"""
+        mask = 0
+        pet_id = None
+        for token in self._pattern.findall(prompt.lower()):
+            token_bits = self._bits.get(token)
+            if token_bits is not None:
+                mask |= token_bits
+            elif pet_id is None:
+                pet_id = int(token)
+                mask |= self._pet_id_bits
+        
+        for intent, required in self._rules:
+            if mask & required == required:
+                return intent, pet_id
+        return self.default, pet_id
+
+class AIOrchestrator:
+    """Simple AI orchestrator that processes prompts and calls appropriate MCP functions
+    
+    Works with any client exposing ``get_pets``, ``get_pet_by_id``, ``search_pets_by_status``,
+    ``search_pets`` and ``iter_pets``. Intents are declared in the class-level tables, so
+    subclasses add list intents by extending them.
+    """
+    
+    # Declarative routing table in priority order, compiled once into a single regex
+    ROUTING_TABLE = [
+        ("all_pets", [("all pets", "list pets")]),
+        ("pet_by_id", [("pet",), ("id", IntentRouter.PET_ID)]),
+        ("pending", [("pending",)]),
+        ("available", [("available", "adoption")]),
+        ("sold", [("sold",)])
+    ]
+    ROUTER = IntentRouter(ROUTING_TABLE)
+    
+    # (status, category) predicates pushed down to the backend for each list intent
+    LIST_FILTERS = {
+        "all_pets": (None, None),
+        "available": ("available", None),
+        "sold": ("sold", None),
+        "pending": ("pending", None)
+    }
+    
+    # Header and error wording for each list intent
+    LIST_RESPONSES = {
+        "all_pets": ("🐾 Here are all the pets in our store:", "the pets"),
+        "available": ("🟢 Here are the pets available for adoption:", "available pets"),
+        "sold": ("🔴 Here are the pets that have been sold:", "sold pets"),
+        "pending": ("🟡 Here are the pets with pending adoptions:", "pending pets")
+    }
+    
+    # Example requests listed by the help response to unrecognised prompts
+    EXAMPLES = [
+        '📋 List all pets: "Show me all pets"',
+        '🔍 Find a specific pet: "Show me pet with ID 123"',
+        '🟢 Available pets: "What pets are available?"',
+        '🟡 Pending adoptions: "Which pets are pending?"',
+        '🔴 Sold pets: "What pets have been sold?"'
+    ]
+    
+    def __init__(self, mcp_client: Any, recorder: LatencyRecorder = None, tracer: Any = None):
+        self.mcp_client = mcp_client
+        # Optional per-stage latency instrumentation (route, backend.<method>, format)
+        self.recorder = recorder
+        # Optional OpenTelemetry tracer: one trace per prompt with route/backend/format child spans
+        self.tracer = tracer
+    
+    def process_prompt(self, prompt: str) -> str:
+        """Process a user prompt and return a formatted response"""
+        with _span(self.tracer, "process_prompt", {"pet_store.prompt": prompt}), _timed(self.recorder, "prompt"):
+            intent, pet_id = self._traced_route(prompt)
+            data = self.fetch(intent, pet_id)
+            with _span(self.tracer, "format", {"pet_store.intent": intent}) as span, _timed(self.recorder, "format"):
+                response = self.render(intent, data, prompt, pet_id)
+                span.set_attribute("pet_store.response_length", len(response))
+                return response
+    
+    def process_prompt_record(self, prompt: str) -> Dict[str, Any]:
+        """Process a user prompt into a machine-readable record without rendering any response text"""
+        started = time.perf_counter()
+        with _span(self.tracer, "process_prompt", {"pet_store.prompt": prompt}):
+            intent, pet_id = self._traced_route(prompt)
+            call = self.backend_call(intent, pet_id)
+            data = None if call is None else self.call_backend(call)
+        return {
+            "prompt": prompt,
+            "intent": intent,
+            "pet_id": pet_id,
+            "backend_calls": [{"method": call[0], "args": list(call[1:])}] if call else [],
+            "latency_ms": (time.perf_counter() - started) * 1000,
+            "result": data
+        }
+    
+    def plan_prompts(self, prompts: List[str]) -> Tuple[List[Tuple[str, Optional[int]]], List[Tuple[Any, ...]]]:
+        """Route every prompt and collect the distinct backend calls they need, in first-use order
+        
+        When the plan fetches every pet, status/category listings are left out of it and
+        later filtered from that single get_pets result instead.
+        """
+        routes = []
+        for prompt in prompts:
+            routes.append(self._traced_route(prompt))
+        calls = dict.fromkeys(call for call in (self.backend_call(*route) for route in routes) if call is not None)
+        if ("get_pets",) in calls:
+            return routes, [call for call in calls if self._list_filter(call) is None]
+        return routes, list(calls)
+    
+    def process_prompts(self, prompts: List[str], max_workers: int = 1,
+                        plan: Tuple[List[Tuple[str, Optional[int]]], List[Tuple[Any, ...]]] = None) -> List[str]:
+        """Process a batch of prompts, executing each distinct backend call only once
+        
+        All prompts are routed first (or ``plan`` from plan_prompts is reused), the unique
+        backend calls are executed (concurrently with ``max_workers`` > 1) and the results
+        are fanned back out to every prompt that needs them, e.g. "all pets", "available"
+        and "sold" prompts all share a single get_pets call.
+        """
+        routes, calls = plan or self.plan_prompts(prompts)
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            results = dict(zip(calls, executor.map(self.call_backend, calls)))
+        
+        responses = []
+        for prompt, (intent, pet_id) in zip(prompts, routes):
+            call = self.backend_call(intent, pet_id)
+            data = None if call is None else self._planned_result(call, results)
+            with _timed(self.recorder, "format"):
+                responses.append(self.render(intent, data, prompt, pet_id))
+        return responses
+    
+    def stream_prompt(self, prompt: str) -> Iterator[str]:
+        """Process a user prompt, yielding the response incrementally (one pet at a time for lists)"""
+        intent, pet_id = self._traced_route(prompt)
+        data = self.fetch(intent, pet_id, stream=True)
+        return self.render_stream(intent, data, prompt, pet_id)
+    
+    def _traced_route(self, prompt: str) -> Tuple[str, Optional[int]]:
+        """Route a prompt inside the route span and latency stage"""
+        with _span(self.tracer, "route") as span, _timed(self.recorder, "route"):
+            intent, pet_id = self.route(prompt)
+            span.set_attribute("pet_store.intent", intent)
+            if pet_id is not None:
+                span.set_attribute("pet_store.pet_id", pet_id)
+            return intent, pet_id
+    
+    def route(self, prompt: str) -> Tuple[str, Optional[int]]:
+        """Resolve a prompt to an intent name and, for lookups, the pet ID"""
+        intent, pet_id = self.ROUTER.route(prompt)
+        if intent == "pet_by_id":
+            return ("pet_by_id", pet_id) if pet_id else ("missing_pet_id", None)
+        return intent, None
+    
+    def backend_call(self, intent: str, pet_id: int = None) -> Optional[Tuple[Any, ...]]:
+        """Describe the backend call an intent needs as a hashable ``(method, *args)`` tuple"""
+        if intent == "pet_by_id":
+            return ("get_pet_by_id", pet_id)
+        if intent not in self.LIST_FILTERS:
+            return None
+        status, category = self.LIST_FILTERS[intent]
+        if category is not None:
+            return ("search_pets", status, category)
+        if status is not None:
+            return ("search_pets_by_status", status)
+        return ("get_pets",)
+    
+    @staticmethod
+    def _list_filter(call: Tuple[Any, ...]) -> Optional[Tuple[Optional[str], Optional[str]]]:
+        """(status, category) of a filtered listing call, or None for any other call"""
+        if call[0] == "search_pets_by_status":
+            return call[1], None
+        if call[0] == "search_pets":
+            return call[1], call[2]
+        return None
+    
+    def _planned_result(self, call: Tuple[Any, ...], results: Dict[Tuple[Any, ...], Any]) -> Any:
+        """Look up a call in an executed plan, filtering listings left out of it from get_pets"""
+        if call in results:
+            return results[call]
+        pets = results[("get_pets",)]
+        if isinstance(pets, list):
+            return list(filter_pets(pets, *self._list_filter(call)))
+        # get_pets failed or answered with an envelope, so ask for the listing itself
+        return self.call_backend(call)
+    
+    def call_backend(self, call: Tuple[Any, ...]) -> Any:
+        """Execute a backend call described by backend_call"""
+        method, *args = call
+        attributes = {"pet_store.backend.method": method, "pet_store.backend.args": [str(arg) for arg in args]}
+        with _span(self.tracer, f"backend.{method}", attributes) as span, _timed(self.recorder, f"backend.{method}"):
+            data = getattr(self.mcp_client, method)(*args)
+            span.set_attributes(_result_attributes(data))
+            return data
+    
+    def fetch(self, intent: str, pet_id: int = None, stream: bool = False) -> Any:
+        """Call the backend for a routed intent (None for intents that need no data)
+        
+        With ``stream=True`` list intents return the client's ``iter_pets`` iterator (e.g. over
+        an incrementally parsed response body) instead of a materialised list.
+        """
+        if stream and intent in self.LIST_FILTERS:
+            status, category = self.LIST_FILTERS[intent]
+            return self.mcp_client.iter_pets(status=status, category=category)
+        call = self.backend_call(intent, pet_id)
+        return None if call is None else self.call_backend(call)
+    
+    def render(self, intent: str, data: Any, prompt: str = "", pet_id: int = None) -> str:
+        """Format backend data for a routed intent into the response text"""
+        if intent == "pet_by_id":
+            if "error" in data:
+                return f"❌ Sorry, I couldn't find pet {pet_id}: {data['error']}"
+            return self._format_single_pet_response(data)
+        elif intent in self.LIST_RESPONSES:
+            header, subject = self.LIST_RESPONSES[intent]
+            if isinstance(data, dict) and "error" in data:
+                return f"❌ Sorry, I couldn't fetch {subject}: {data['error']}"
+            return self._format_pets_response(data, header)
+        elif intent == "missing_pet_id":
+            return "🤔 I couldn't find a valid pet ID in your request. Please specify a pet ID number."
+        return self._handle_general_query(prompt)
+    
+    def render_stream(self, intent: str, data: Any, prompt: str = "", pet_id: int = None) -> Iterator[str]:
+        """Like render, but yields list responses one pet at a time"""
+        if intent in self.LIST_RESPONSES and not (isinstance(data, dict) and "error" in data):
+            return self._iter_pets_response(data, self.LIST_RESPONSES[intent][0])
+        return iter([self.render(intent, data, prompt, pet_id)])
+    
+    def _handle_general_query(self, prompt: str) -> str:
+        """Handle general queries about the pet store"""
+        examples = "\n".join(f"• {example}" for example in self.EXAMPLES)
+        return f"""🐕 Welcome to our Pet Store! 🐱
+
+I can help you with:
+{examples}
+
+Your request: "{prompt}"
+Try rephrasing your question using one of the examples above! 😊"""
+    
+    def _format_pets_response(self, data: Iterable[Dict[str, Any]], header: str) -> str:
+        """Format a list of pets into a nice response"""
+        return "".join(self._iter_pets_response(data, header))
+    
+    def _iter_pets_response(self, data: Iterable[Dict[str, Any]], header: str) -> Iterator[str]:
+        """Yield a list-of-pets response one pet at a time"""
+        pets = data or []
+        if isinstance(pets, dict):
+            pets = [pets]
+        
+        # Each field is looked up once per pet and emojis are memoised per distinct
+        # category/status, so cost grows linearly with the list
+        yield f"{header}\n\n"
+        found = False
+        pet_emojis: Dict[str, str] = {}
+        status_emojis: Dict[str, str] = {}
+        
+        for pet in pets:
+            found = True
+            category_name = pet.get('category', {}).get('name')
+            status = pet.get('status')
+            tags = pet.get('tags')
+            
+            pet_emoji = pet_emojis.get(category_name)
+            if pet_emoji is None:
+                pet_emoji = pet_emojis[category_name] = self._get_pet_emoji(category_name)
+            status_emoji = status_emojis.get(status)
+            if status_emoji is None:
+                status_emoji = status_emojis[status] = self._get_status_emoji(status)
+            
+            chunk = (f"{pet_emoji} **Pet #{pet.get('id', 'Unknown')}**: {pet.get('name', 'Unnamed')}\n"
+                     f"   📂 Category: {'Unknown' if category_name is None else category_name}\n"
+                     f"   {status_emoji} Status: {('Unknown' if status is None else status).title()}\n")
+            if tags:
+                chunk += f"   🏷️  Tags: {', '.join([tag.get('name', '') for tag in tags])}\n"
+            yield chunk + "\n"
+        
+        if not found:
+            yield "😔 No pets found."
+    
+    def _format_single_pet_response(self, pet: Dict[str, Any]) -> str:
+        """Format a single pet into a detailed response"""
+        pet_emoji = self._get_pet_emoji(pet.get('category', {}).get('name', ''))
+        status_emoji = self._get_status_emoji(pet.get('status', ''))
+        
+        response = f"{pet_emoji} **Pet Details** {pet_emoji}\n\n"
+        response += f"🆔 ID: {pet.get('id', 'Unknown')}\n"
+        response += f"📛 Name: {pet.get('name', 'Unnamed')}\n"
+        response += f"📂 Category: {pet.get('category', {}).get('name', 'Unknown')}\n"
+        response += f"{status_emoji} Status: {pet.get('status', 'Unknown').title()}\n"
+        
+        if pet.get('tags'):
+            tags = ', '.join([tag.get('name', '') for tag in pet.get('tags', [])])
+            response += f"🏷️  Tags: {tags}\n"
+        
+        if pet.get('photoUrls'):
+            response += f"📸 Photos: {len(pet.get('photoUrls', []))} available\n"
+        
+        return response
+    
+    def _get_pet_emoji(self, category: str) -> str:
+        """Get appropriate emoji for pet category"""
+        category_lower = category.lower() if category else ""
+        if "dog" in category_lower:
+            return "🐕"
+        elif "cat" in category_lower:
+            return "🐱"
+        elif "bird" in category_lower:
+            return "🐦"
+        elif "fish" in category_lower:
+            return "🐠"
+        elif "rabbit" in category_lower:
+            return "🐰"
+        else:
+            return "🐾"
+    
+    def _get_status_emoji(self, status: str) -> str:
+        """Get appropriate emoji for pet status"""
+        status_lower = status.lower() if status else ""
+        if status_lower == "available":
+            return "🟢"
+        elif status_lower == "pending":
+            return "🟡"
+        elif status_lower == "sold":
+            return "🔴"
+        else:
+            return "❓"
+
+def read_prompts(lines: Iterable[str]) -> Iterator[str]:
+    """Lazily yield prompts from plain text or JSONL lines, skipping blank lines
+    
+    A line holding a JSON object with a ``prompt`` field is read as a JSONL record;
+    any other non-empty line is taken as the prompt itself.
+    """
+    for line in lines:
+        line = line.strip()
+        if not line:
+            continue
+        if line.startswith("{"):
+            try:
+                record = json.loads(line)
+            except ValueError:
+                record = None
+            if isinstance(record, dict) and "prompt" in record:
+                yield str(record["prompt"])
+                continue
+        yield line
+
+class BaseDemoApp:
+    """Prompt-processing front end shared by the demo scripts
+    
+    Subclasses build the backend client, pick the orchestrator class and print their own
+    introduction and run summary through the ``_print_intro``/``_print_summary`` hooks.
+    """
+    
+    ORCHESTRATOR = AIOrchestrator
+    # Width of the rule printed under each prompt
+    PROMPT_RULE_WIDTH = 50
+    
+    def __init__(self, client: Any, max_workers: int = 1, stream: bool = False, batch: bool = False,
+                 jsonl: bool = False, recorder: LatencyRecorder = None, tracer: Any = None):
+        self.client = client
+        self.orchestrator = self.ORCHESTRATOR(client, recorder=recorder, tracer=tracer)
+        
+        # Predefined prompts as required
+        self.predefined_prompts = [
+            "Show me all pets in the store",
+            "What pets are available for adoption?", 
+            "Find me pet with ID 1",
+            "Which pets are currently pending adoption?",
+            "Show me all sold pets",
+            "Tell me about pet number 42",
+            "List available dogs",
+            "What cats do you have?"
+        ]
+        
+        # Number of prompts processed concurrently (1 keeps the original sequential behaviour)
+        self.max_workers = max_workers
+        # Write list responses pet by pet as they are rendered instead of building one string
+        self.stream = stream
+        # Plan all prompts up front and execute each distinct backend call once
+        self.batch = batch
+        # Emit one JSON object per prompt and skip emoji rendering entirely
+        self.jsonl = jsonl
+        # Per-stage latency samples, reported at the end of the run when set
+        self.recorder = recorder
+    
+    def _process_prompt(self, prompt: str) -> str:
+        """Process a single prompt, turning failures into an error message"""
+        try:
+            return self.orchestrator.process_prompt(prompt)
+        except Exception as e:
+            logger.exception("Error processing prompt")
+            return f"❌ Error processing prompt: {e}"
+    
+    def _process_record(self, prompt: str) -> Dict[str, Any]:
+        """Process a single prompt into a JSONL record, turning failures into an error field"""
+        try:
+            return self.orchestrator.process_prompt_record(prompt)
+        except Exception as e:
+            logger.exception("Error processing prompt")
+            return {"prompt": prompt, "error": str(e)}
+    
+    def _print_record(self, index: int, record: Dict[str, Any]) -> None:
+        """Write one record as a single JSON line"""
+        print(json.dumps({"index": index, **record}, ensure_ascii=False, default=str))
+    
+    def run_jsonl(self) -> None:
+        """Run the predefined prompts, writing one JSON object per prompt instead of decorated text"""
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            records = executor.map(self._process_record, self.predefined_prompts)
+            for index, record in enumerate(records, 1):
+                self._print_record(index, record)
+    
+    def _process_batch(self, plan: Tuple[List[Tuple[str, Optional[int]]], List[Tuple[Any, ...]]] = None) -> List[str]:
+        """Process all prompts with one deduplicated backend plan"""
+        try:
+            return self.orchestrator.process_prompts(self.predefined_prompts, max_workers=self.max_workers,
+                                                     plan=plan)
+        except Exception as e:
+            logger.exception("Error processing prompts")
+            return [f"❌ Error processing prompt: {e}"] * len(self.predefined_prompts)
+    
+    def _print_responses(self, responses: Iterable[str]) -> None:
+        """Print responses in prompt order as they become available"""
+        total = len(self.predefined_prompts)
+        for i, (prompt, response) in enumerate(zip(self.predefined_prompts, responses), 1):
+            self._print_response(f"{i}/{total}", prompt, response)
+    
+    def _print_response(self, label: str, prompt: str, response: str) -> None:
+        """Print one prompt and its response between separators"""
+        print(f"📝 Prompt {label}: {prompt}")
+        print("-" * self.PROMPT_RULE_WIDTH)
+        print(response)
+        print()
+        print("=" * 80)
+        print()
+    
+    def close(self) -> None:
+        """Release the backend client's resources (nothing to release by default)"""
+    
+    def print_timings(self, file=None) -> None:
+        """Print the per-stage latency table when instrumentation is enabled"""
+        if self.recorder is None:
+            return
+        print("⏱️  Latency by stage:", file=file)
+        print(self.recorder.format_table(), file=file)
+        print(file=file)
+    
+    def run_prompts(self, prompts: Iterable[str], max_in_flight: int = None) -> int:
+        """Process a stream of prompts with bounded concurrency, printing responses as they complete
+        
+        At most ``max_in_flight`` prompts (default: twice the worker count) are read ahead of the
+        slowest unfinished one, so arbitrarily long inputs such as replayed query logs run in
+        constant memory. Responses are printed in completion order and numbered by input
+        position. Returns the number of prompts processed.
+        """
+        max_in_flight = max(1, max_in_flight or 2 * self.max_workers)
+        pending: Dict[Future, Tuple[int, str]] = {}
+        count = 0
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            process = self._process_record if self.jsonl else self._process_prompt
+            for number, prompt in enumerate(prompts, 1):
+                pending[executor.submit(process, prompt)] = (number, prompt)
+                if len(pending) >= max_in_flight:
+                    count += self._print_completed(pending, FIRST_COMPLETED)
+            count += self._print_completed(pending, ALL_COMPLETED)
+        return count
+    
+    def _print_completed(self, pending: Dict[Future, Tuple[int, str]], return_when: str) -> int:
+        """Wait for in-flight prompts, then print and forget the finished ones"""
+        if not pending:
+            return 0
+        done, _ = wait(pending, return_when=return_when)
+        for future in done:
+            number, prompt = pending.pop(future)
+            if self.jsonl:
+                self._print_record(number, future.result())
+            else:
+                self._print_response(f"#{number}", prompt, future.result())
+        sys.stdout.flush()
+        return len(done)
+    
+    def run_input(self, path: str) -> int:
+        """Process prompts read line by line from a text or JSONL file ("-" reads stdin)"""
+        if path == "-":
+            return self.run_prompts(read_prompts(sys.stdin))
+        with open(path, encoding="utf-8") as f:
+            return self.run_prompts(read_prompts(f))
+    
+    def _stream_prompt(self, prompt: str) -> None:
+        """Process a single prompt, writing the response to stdout as it is produced"""
+        try:
+            for chunk in self.orchestrator.stream_prompt(prompt):
+                sys.stdout.write(chunk)
+        except Exception as e:
+            logger.exception("Error processing prompt")
+            sys.stdout.write(f"❌ Error processing prompt: {e}")
+        sys.stdout.write("\n")
+    
+    def _print_intro(self) -> None:
+        """Print what the demo connects to, between the welcome banner and the first prompt"""
+    
+    def _print_summary(self) -> None:
+        """Print backend statistics after the latency table, before the closing line"""
+    
+    def run(self):
+        """Run the demo application"""
+        print("🏪 Welcome to the Pet Store MCP Demo! 🏪")
+        print("=" * 50)
+        print()
+        
+        self._print_intro()
+        print()
+        
+        total = len(self.predefined_prompts)
+        if self.stream:
+            # Streaming keeps time-to-first-line and memory flat, so prompts run one at a time
+            for i, prompt in enumerate(self.predefined_prompts, 1):
+                print(f"📝 Prompt {i}/{total}: {prompt}")
+                print("-" * self.PROMPT_RULE_WIDTH)
+                self._stream_prompt(prompt)
+                print()
+                print("=" * 80)
+                print()
+        elif self.batch:
+            plan = self.orchestrator.plan_prompts(self.predefined_prompts)
+            print(f"🧮 Batch plan: {len(plan[1])} backend calls for {total} prompts")
+            print()
+            self._print_responses(self._process_batch(plan))
+        else:
+            with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+                # map() dispatches every prompt up front but yields responses in prompt order
+                self._print_responses(executor.map(self._process_prompt, self.predefined_prompts))
+        
+        self.print_timings()
+        self._print_summary()
+        print("✅ Demo completed! Thank you for using the Pet Store MCP Demo! 🎉")
\ No newline at end of file
@@ -14,46 +14,1186 @@ Requirements:
 - Make the output look nice, use emojis and such
 """
 
+import argparse
 import asyncio
+import codecs
+import itertools
 import json
 import logging
+import math
+import random
+import re
 import sys
-from typing import List, Dict, Any
+import threading
+import time
+from collections import OrderedDict, deque
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from email.utils import parsedate_to_datetime
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, Hashable, Iterable, Iterator, List, Optional, Tuple
 import requests
+from requests.adapters import HTTPAdapter
 from urllib.parse import urljoin
 
+# AIOrchestrator, IntentRouter and read_prompts are also re-exported from here for existing imports
+from pet_store_common import (AIOrchestrator, BaseDemoApp, IntentRouter, LatencyRecorder, _result_attributes, _span,
+                              _timed, configure_tracing, filter_pets, read_prompts)
+
+try:
+    import httpx
+except ImportError:  # Optional dependency, only needed for AsyncPetStoreMCPClient
+    httpx = None
+
+try:
+    from opentelemetry import propagate as otel_propagate, trace as otel_trace
+except ImportError:  # Optional dependency, only needed for --trace
+    otel_propagate = otel_trace = None
+
 # Configure logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
+# httpx logs every request at INFO, which would drown out the demo output
+logging.getLogger("httpx").setLevel(logging.WARNING)
+
+class SingleFlight:
+    """Coalesce concurrent identical calls into one in-flight call
+    
+    The first caller for a key runs the function; callers arriving with the same key while
+    it is running wait for it and receive the same result (or exception). Shared results
+    must be treated as read-only.
+    """
+    
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls: Dict[Hashable, Future] = {}
+        self.coalesced = 0
+    
+    def do(self, key: Hashable, fn: Callable[[], Any]) -> Any:
+        """Run ``fn`` for ``key`` unless an identical call is already in flight"""
+        with self._lock:
+            future = self._calls.get(key)
+            leader = future is None
+            if leader:
+                future = self._calls[key] = Future()
+            else:
+                self.coalesced += 1
+        
+        if leader:
+            try:
+                future.set_result(fn())
+            except BaseException as e:
+                future.set_exception(e)
+            finally:
+                with self._lock:
+                    del self._calls[key]
+        return future.result()
+
+class AsyncSingleFlight:
+    """Asyncio counterpart of SingleFlight: concurrent identical coroutines share one task"""
+    
+    def __init__(self):
+        self._calls: Dict[Hashable, asyncio.Task] = {}
+        self.coalesced = 0
+    
+    async def do(self, key: Hashable, coro_fn: Callable[[], Awaitable[Any]]) -> Any:
+        """Await ``coro_fn()`` for ``key`` unless an identical call is already in flight"""
+        task = self._calls.get(key)
+        if task is None:
+            task = self._calls[key] = asyncio.ensure_future(coro_fn())
+            task.add_done_callback(lambda _: self._calls.pop(key, None))
+        else:
+            self.coalesced += 1
+        # Shield so one cancelled waiter does not cancel the call shared by the others
+        return await asyncio.shield(task)
+
+class ResponseCache:
+    """In-process TTL + LRU cache for decoded backend responses
+    
+    Entries expire after a per-endpoint TTL, and the least recently used entries are evicted
+    once either ``max_entries`` or ``max_bytes`` (measured on the raw response body) is
+    exceeded. Any object exposing the same ``get``/``set`` methods can be plugged into
+    PetStoreMCPClient instead.
+    """
+    
+    def __init__(self, max_entries: int = 1024, max_bytes: int = 64 * 1024 * 1024,
+                 default_ttl: float = 30.0, ttls: Dict[str, float] = None):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.default_ttl = default_ttl
+        # Per-endpoint TTLs in seconds, e.g. {"/pets/{id}": 300, "/pets": 10}
+        self.ttls = dict(ttls or {})
+        self._entries: "OrderedDict[Hashable, Tuple[float, int, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+    
+    def get(self, key: Hashable) -> Any:
+        """Return the cached value for key, or None when missing or expired"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                expires, size, value = entry
+                if expires > time.monotonic():
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return value
+                del self._entries[key]
+                self.bytes -= size
+            self.misses += 1
+            return None
+    
+    def set(self, key: Hashable, value: Any, size: int, endpoint: str = None) -> None:
+        """Store a value using the TTL configured for its endpoint"""
+        ttl = self.ttls.get(endpoint, self.default_ttl)
+        if ttl <= 0 or size > self.max_bytes:
+            return
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self.bytes -= previous[1]
+            self._entries[key] = (time.monotonic() + ttl, size, value)
+            self.bytes += size
+            while len(self._entries) > self.max_entries or self.bytes > self.max_bytes:
+                _, (_, evicted_size, _) = self._entries.popitem(last=False)
+                self.bytes -= evicted_size
+                self.evictions += 1
+    
+    def clear(self) -> None:
+        """Drop every cached entry"""
+        with self._lock:
+            self._entries.clear()
+            self.bytes = 0
+    
+    def stats(self) -> Dict[str, Any]:
+        """Return hit/miss counters and current occupancy"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": self.hits / lookups if lookups else 0.0,
+                "evictions": self.evictions,
+                "entries": len(self._entries),
+                "bytes": self.bytes
+            }
+
+class ValidatorStore:
+    """Bounded LRU store of response validators (ETag / Last-Modified) and their bodies
+    
+    Lets the client send conditional GETs and reuse the stored body when the gateway
+    answers ``304 Not Modified``. Entries outlive ResponseCache TTLs on purpose: an expired
+    cache entry can still be revalidated with a header-only round trip. Like the cache, the
+    store is bounded by both ``max_entries`` and ``max_bytes`` of raw response body.
+    """
+    
+    def __init__(self, max_entries: int = 256, max_bytes: int = 16 * 1024 * 1024):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._entries: "OrderedDict[Hashable, Tuple[str, str, Any, int]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.bytes = 0
+        self.not_modified = 0
+    
+    def get(self, key: Hashable) -> Tuple[str, str, Any, int]:
+        """Return (etag, last_modified, body, size) for key, or None"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+            return entry
+    
+    def set(self, key: Hashable, etag: str, last_modified: str, body: Any, size: int) -> None:
+        """Remember the validators and body of a 200 response"""
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self.bytes -= previous[3]
+            if size > self.max_bytes:
+                return
+            self._entries[key] = (etag, last_modified, body, size)
+            self.bytes += size
+            while len(self._entries) > self.max_entries or self.bytes > self.max_bytes:
+                _, (_, _, _, evicted_size) = self._entries.popitem(last=False)
+                self.bytes -= evicted_size
+    
+    def record_not_modified(self) -> None:
+        """Count a 304 answered from a stored body"""
+        with self._lock:
+            self.not_modified += 1
+    
+    @staticmethod
+    def conditional_headers(entry: Tuple[str, str, Any, int]) -> Dict[str, str]:
+        """Build If-None-Match / If-Modified-Since headers for a stored entry"""
+        etag, last_modified, _, _ = entry
+        headers = {}
+        if etag:
+            headers["If-None-Match"] = etag
+        if last_modified:
+            headers["If-Modified-Since"] = last_modified
+        return headers
+
+class RetryBudget:
+    """Caps retries at a fraction of recent requests so retries cannot amplify an outage
+    
+    Every request deposits ``ratio`` tokens (up to ``max_tokens``) and every retry spends one
+    whole token. The budget starts with ``min_tokens`` so a quiet client can still retry.
+    """
+    
+    def __init__(self, ratio: float = 0.2, min_tokens: float = 10.0, max_tokens: float = 100.0):
+        self.ratio = ratio
+        self.max_tokens = max_tokens
+        self._tokens = min_tokens
+        self._lock = threading.Lock()
+    
+    def deposit(self) -> None:
+        """Credit the budget for one original request"""
+        with self._lock:
+            self._tokens = min(self.max_tokens, self._tokens + self.ratio)
+    
+    def withdraw(self) -> bool:
+        """Spend one token on a retry; False when the budget is exhausted"""
+        with self._lock:
+            if self._tokens < 1:
+                return False
+            self._tokens -= 1
+            return True
+
+class RetryPolicy:
+    """Exponential backoff with full jitter for idempotent requests
+    
+    Transport errors and ``retry_statuses`` responses are retried up to ``max_attempts``
+    attempts in total. A ``Retry-After`` header on 429/503 (as sent by API Management when
+    throttling) replaces the computed backoff, and is treated as final when it exceeds
+    ``max_retry_after``. Every retry must also be paid for by the shared RetryBudget.
+    """
+    
+    IDEMPOTENT_METHODS = frozenset({"GET", "HEAD", "OPTIONS", "PUT", "DELETE"})
+    
+    def __init__(self, max_attempts: int = 3, base_delay: float = 0.2, max_delay: float = 5.0,
+                 max_retry_after: float = 30.0, retry_statuses: Iterable[int] = (429, 502, 503, 504),
+                 budget: RetryBudget = None):
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.max_retry_after = max_retry_after
+        self.retry_statuses = frozenset(retry_statuses)
+        self.budget = budget if budget is not None else RetryBudget()
+        self._lock = threading.Lock()
+        self.retries = 0
+        self.budget_exhausted = 0
+    
+    def backoff(self, attempt: int) -> float:
+        """Full-jitter delay after the given (1-based) failed attempt"""
+        return random.uniform(0, min(self.max_delay, self.base_delay * 2 ** (attempt - 1)))
+    
+    @staticmethod
+    def parse_retry_after(value: Optional[str]) -> Optional[float]:
+        """Parse a Retry-After header given in seconds or as an HTTP date"""
+        if not value:
+            return None
+        try:
+            return max(0.0, float(value))
+        except ValueError:
+            pass
+        try:
+            return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+        except (TypeError, ValueError):
+            return None
+    
+    def next_delay(self, method: str, attempt: int, status_code: int = None,
+                   headers: Dict[str, str] = None) -> Optional[float]:
+        """Seconds to wait before retrying a failed attempt, or None to give up
+        
+        ``status_code`` is None for transport failures (connection errors and timeouts).
+        """
+        if method.upper() not in self.IDEMPOTENT_METHODS or attempt >= self.max_attempts:
+            return None
+        if status_code is not None and status_code not in self.retry_statuses:
+            return None
+        delay = self.backoff(attempt)
+        if status_code in (429, 503) and headers:
+            retry_after = self.parse_retry_after(headers.get("Retry-After"))
+            if retry_after is not None:
+                if retry_after > self.max_retry_after:
+                    return None
+                delay = retry_after
+        if not self.budget.withdraw():
+            with self._lock:
+                self.budget_exhausted += 1
+            return None
+        with self._lock:
+            self.retries += 1
+        return delay
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling an endpoint whose circuit breaker is open"""
+
+class CircuitBreaker:
+    """Closed / open / half-open circuit breaker guarding one endpoint
+    
+    After ``failure_threshold`` consecutive failures (transport errors or 5xx responses) the
+    circuit opens and calls fail fast with CircuitOpenError. Once ``reset_timeout`` seconds
+    have passed it goes half-open and lets ``half_open_max_calls`` trial calls through: a
+    success closes the circuit again, a failure reopens it for another ``reset_timeout``.
+    """
+    
+    CLOSED, OPEN, HALF_OPEN = "closed", "open", "half-open"
+    
+    def __init__(self, name: str, failure_threshold: int = 5, reset_timeout: float = 30.0,
+                 half_open_max_calls: int = 1):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.half_open_max_calls = half_open_max_calls
+        self._state = self.CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._trial_calls = 0
+        self._lock = threading.Lock()
+        self.rejected = 0
+    
+    @property
+    def state(self) -> str:
+        """Current state, moving an open circuit to half-open once its reset timeout has passed"""
+        with self._lock:
+            self._maybe_half_open()
+            return self._state
+    
+    def _maybe_half_open(self) -> None:
+        if self._state == self.OPEN and time.monotonic() - self._opened_at >= self.reset_timeout:
+            self._state = self.HALF_OPEN
+            self._trial_calls = 0
+    
+    def allow(self) -> bool:
+        """Return whether a call may proceed, counting it as a trial call when half-open"""
+        with self._lock:
+            self._maybe_half_open()
+            if self._state == self.CLOSED:
+                return True
+            if self._state == self.HALF_OPEN and self._trial_calls < self.half_open_max_calls:
+                self._trial_calls += 1
+                return True
+            self.rejected += 1
+            return False
+    
+    def record(self, success: bool) -> None:
+        """Record the outcome of a call that allow() let through"""
+        with self._lock:
+            if success:
+                if self._state != self.CLOSED:
+                    logger.info(f"Circuit breaker for {self.name} closed")
+                self._state = self.CLOSED
+                self._failures = 0
+                return
+            self._failures += 1
+            if self._state == self.HALF_OPEN or (self._state == self.CLOSED
+                                                 and self._failures >= self.failure_threshold):
+                logger.warning(f"Circuit breaker for {self.name} opened after {self._failures} failure(s)")
+                self._state = self.OPEN
+                self._opened_at = time.monotonic()
+    
+    def release(self) -> None:
+        """Hand back a call that allow() let through but that ended without an outcome
+        
+        Used when the caller is cancelled or interrupted: nothing is learned about the backend,
+        so the state is left alone and only a half-open trial slot is freed for the next call.
+        """
+        with self._lock:
+            if self._state == self.HALF_OPEN and self._trial_calls > 0:
+                self._trial_calls -= 1
+
+class CircuitBreakers:
+    """Circuit breaker per endpoint, created on first use with shared thresholds"""
+    
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 30.0, half_open_max_calls: int = 1):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.half_open_max_calls = half_open_max_calls
+        self._breakers: Dict[str, CircuitBreaker] = {}
+        self._lock = threading.Lock()
+    
+    def get(self, endpoint: str) -> CircuitBreaker:
+        """Return the breaker for an endpoint label such as "/pets/{id}" """
+        with self._lock:
+            breaker = self._breakers.get(endpoint)
+            if breaker is None:
+                breaker = self._breakers[endpoint] = CircuitBreaker(
+                    endpoint, self.failure_threshold, self.reset_timeout, self.half_open_max_calls)
+            return breaker
+    
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        """Return the state and fast-failed call count of every endpoint's breaker"""
+        with self._lock:
+            breakers = list(self._breakers.values())
+        return {breaker.name: {"state": breaker.state, "rejected": breaker.rejected} for breaker in breakers}
+
+class HedgePolicy:
+    """Decides when to send a backup copy of a slow idempotent GET
+    
+    The hedge delay is either fixed (``delay``) or the observed ``percentile`` latency of the
+    endpoint over its last ``window`` calls, used once ``min_samples`` have been seen. Hedges
+    are paid for from a token budget credited with ``max_rate`` per request, so at most that
+    fraction of requests is ever duplicated.
+    """
+    
+    def __init__(self, delay: float = None, percentile: float = 0.95, min_samples: int = 20,
+                 window: int = 200, max_rate: float = 0.1, min_delay: float = 0.005):
+        self.delay = delay
+        self.percentile = percentile
+        self.min_samples = min_samples
+        self.window = window
+        self.min_delay = min_delay
+        # Same accounting as retries: each request earns a fraction of a hedge
+        self.budget = RetryBudget(ratio=max_rate, min_tokens=1.0, max_tokens=10.0)
+        self._latencies: Dict[str, deque] = {}
+        self._lock = threading.Lock()
+        self.hedged = 0
+        self.backup_wins = 0
+    
+    def observe(self, endpoint: str, seconds: float) -> None:
+        """Record the latency of a completed request"""
+        with self._lock:
+            latencies = self._latencies.get(endpoint)
+            if latencies is None:
+                latencies = self._latencies[endpoint] = deque(maxlen=self.window)
+            latencies.append(seconds)
+    
+    def delay_for(self, endpoint: str) -> Optional[float]:
+        """Seconds to wait before hedging a request to endpoint, or None when not hedging yet"""
+        if self.delay is not None:
+            return self.delay
+        with self._lock:
+            latencies = sorted(self._latencies.get(endpoint, ()))
+        if len(latencies) < self.min_samples:
+            return None
+        index = min(len(latencies) - 1, int(self.percentile * len(latencies)))
+        return max(self.min_delay, latencies[index])
+    
+    def try_hedge(self) -> bool:
+        """Claim a hedge from the rate budget"""
+        if not self.budget.withdraw():
+            return False
+        with self._lock:
+            self.hedged += 1
+        return True
+    
+    def record_backup_win(self) -> None:
+        with self._lock:
+            self.backup_wins += 1
+
+class TokenBucket:
+    """Thread-safe token bucket refilled at ``rate`` tokens per second up to ``capacity``
+    
+    ``reserve`` takes a token immediately and returns how long the caller must wait for it,
+    letting the balance go negative, so the same bucket serves blocking threads
+    (``acquire``) and asyncio tasks (``acquire_async``). A rate of None means unlimited.
+    """
+    
+    def __init__(self, rate: float = None, capacity: float = None):
+        self.rate = rate
+        self.capacity = capacity if capacity is not None else max(1.0, rate or 1.0)
+        self._tokens = self.capacity
+        # Time up to which tokens have been credited; in the future while the bucket is paused
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+    
+    def _refill(self, now: float) -> None:
+        if now > self._updated:
+            if self.rate is not None:
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+    
+    def reserve(self, tokens: float = 1.0) -> float:
+        """Take tokens and return the seconds to wait before using them"""
+        with self._lock:
+            now = time.monotonic()
+            self._refill(now)
+            wait = max(0.0, self._updated - now)
+            if self.rate is None:
+                return wait
+            self._tokens -= tokens
+            return wait + max(0.0, -self._tokens) / self.rate
+    
+    def acquire(self, tokens: float = 1.0) -> float:
+        """Block until tokens are available and return the time waited"""
+        wait = self.reserve(tokens)
+        if wait:
+            time.sleep(wait)
+        return wait
+    
+    async def acquire_async(self, tokens: float = 1.0) -> float:
+        """Like acquire, but yields to the event loop while waiting"""
+        wait = self.reserve(tokens)
+        if wait:
+            await asyncio.sleep(wait)
+        return wait
+    
+    def set_rate(self, rate: Optional[float], capacity: float = None) -> None:
+        """Change the refill rate, crediting tokens earned at the old rate first"""
+        with self._lock:
+            self._refill(time.monotonic())
+            self.rate = rate
+            self.capacity = capacity if capacity is not None else max(1.0, rate or 1.0)
+            self._tokens = min(self._tokens, self.capacity)
+    
+    def pause(self, seconds: float) -> None:
+        """Hand out no tokens for the next ``seconds`` and restart from an empty bucket"""
+        with self._lock:
+            now = time.monotonic()
+            self._refill(now)
+            self._tokens = min(self._tokens, 0.0)
+            self._updated = max(self._updated, now + seconds)
+
+class RateLimiter:
+    """Client-side rate limiting with a global and optional per-endpoint token buckets
+    
+    The global bucket self-tunes from the gateway's rate-limit response headers
+    (``RateLimit-*`` / ``X-RateLimit-*`` limit, remaining, reset and ``RateLimit-Policy``
+    window): its rate follows the quota left in the current window, scaled by ``safety``
+    and never above the configured ``rate``. Exhausted quotas and ``Retry-After`` on
+    429/503 pause the bucket, so requests queue up client-side instead of being throttled.
+    """
+    
+    def __init__(self, rate: float = None, burst: float = None, endpoint_rates: Dict[str, float] = None,
+                 safety: float = 0.9, min_rate: float = 0.1):
+        self.max_rate = rate
+        # Configured burst, kept when the rate is retuned (None scales it with the rate)
+        self.burst = burst
+        self.safety = safety
+        self.min_rate = min_rate
+        self.bucket = TokenBucket(rate, burst)
+        self.endpoint_buckets = {endpoint: TokenBucket(endpoint_rate)
+                                 for endpoint, endpoint_rate in (endpoint_rates or {}).items()}
+        self._lock = threading.Lock()
+        self.waited = 0.0
+        self.delayed = 0
+        self.throttled = 0
+    
+    def reserve(self, endpoint: str) -> float:
+        """Take a token from the global and the endpoint's bucket and return the seconds to wait"""
+        wait = self.bucket.reserve()
+        endpoint_bucket = self.endpoint_buckets.get(endpoint)
+        if endpoint_bucket is not None:
+            wait = max(wait, endpoint_bucket.reserve())
+        if wait:
+            with self._lock:
+                self.waited += wait
+                self.delayed += 1
+        return wait
+    
+    def acquire(self, endpoint: str) -> None:
+        """Block the calling thread until a request to endpoint may be sent"""
+        wait = self.reserve(endpoint)
+        if wait:
+            time.sleep(wait)
+    
+    async def acquire_async(self, endpoint: str) -> None:
+        """Wait without blocking the event loop until a request to endpoint may be sent"""
+        wait = self.reserve(endpoint)
+        if wait:
+            await asyncio.sleep(wait)
+    
+    @staticmethod
+    def parse_headers(headers: Dict[str, str]) -> Tuple[Optional[float], Optional[float], Optional[float], Optional[float]]:
+        """Extract (limit, remaining, reset seconds, window seconds) from rate-limit headers"""
+        def number(*names: str) -> Optional[float]:
+            for name in names:
+                value = headers.get(name)
+                if value:
+                    match = re.match(r"\s*(\d+(?:\.\d+)?)", value)
+                    if match:
+                        return float(match.group(1))
+            return None
+        
+        limit = number("RateLimit-Limit", "X-RateLimit-Limit")
+        remaining = number("RateLimit-Remaining", "X-RateLimit-Remaining")
+        reset = number("RateLimit-Reset", "X-RateLimit-Reset")
+        if reset is not None and reset > 1e9:
+            # Some gateways send the reset time as a Unix timestamp rather than a delay
+            reset = max(0.0, reset - time.time())
+        window = None
+        policy = headers.get("RateLimit-Policy")
+        if policy:
+            match = re.match(r"\s*(\d+(?:\.\d+)?)\s*;.*?\bw=(\d+(?:\.\d+)?)", policy)
+            if match:
+                limit, window = float(match.group(1)), float(match.group(2))
+        return limit, remaining, reset, window
+    
+    def update(self, status_code: int, headers: Dict[str, str]) -> None:
+        """Tune the global bucket from a gateway response"""
+        if status_code == 429:
+            with self._lock:
+                self.throttled += 1
+        if status_code in (429, 503):
+            retry_after = RetryPolicy.parse_retry_after(headers.get("Retry-After"))
+            if retry_after:
+                self.bucket.pause(retry_after)
+        
+        limit, remaining, reset, window = self.parse_headers(headers)
+        rates = []
+        if limit and window:
+            rates.append(limit / window)
+        if remaining is not None and reset:
+            if remaining < 1:
+                # Wait for the window to reset, then resume at the quota rate (or the current one)
+                self.bucket.pause(reset)
+            else:
+                rates.append(remaining / reset)
+        if rates:
+            rate = max(self.min_rate, min(rates) * self.safety)
+            if self.max_rate is not None:
+                rate = min(rate, self.max_rate)
+            self.bucket.set_rate(rate, self.burst)
+
+class AdaptiveConcurrencyLimit:
+    """Adaptive cap on in-flight backend requests
+    
+    Completed requests are grouped into windows of at least ``window`` requests (and at
+    least the current limit), and the limit is adjusted once per window, like TCP once per
+    round trip. With ``algorithm="aimd"`` a window that kept the limit in use at a stable
+    latency adds one slot, while a window with a failure (transport error, 429 or 5xx) or an
+    average latency above ``tolerance`` times the no-load latency multiplies the limit by
+    ``backoff_ratio``. With ``algorithm="gradient"`` the limit follows
+    ``limit * tolerance * min_latency / latency`` (at most halving it) plus a ``sqrt(limit)``
+    queue allowance, smoothed by ``smoothing``. The no-load latency is the lowest window
+    average, re-learned every ``baseline_windows`` windows (or at once from a window that
+    ran at the minimum limit) so it can follow a slower backend.
+    Threads block in ``acquire`` and asyncio tasks await ``acquire_async`` while the limit
+    is reached.
+    """
+    
+    def __init__(self, algorithm: str = "aimd", initial_limit: int = 10, min_limit: int = 1,
+                 max_limit: int = 100, backoff_ratio: float = 0.9, tolerance: float = 2.0,
+                 smoothing: float = 0.2, window: int = 10, baseline_windows: int = 100):
+        if algorithm not in ("aimd", "gradient"):
+            raise ValueError(f"Unknown concurrency algorithm: {algorithm}")
+        self.algorithm = algorithm
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.backoff_ratio = backoff_ratio
+        self.tolerance = tolerance
+        self.smoothing = smoothing
+        self.window = window
+        self.baseline_windows = baseline_windows
+        self._limit = float(max(min_limit, min(initial_limit, max_limit)))
+        self._inflight = 0
+        self._cond = threading.Condition()
+        self._async_waiters: deque = deque()
+        # Current window: sample count, successful latency total, failures and peak usage
+        self._samples = 0
+        self._successes = 0
+        self._latency_total = 0.0
+        self._failed = False
+        self._peak_inflight = 0
+        self._min_latency = None
+        self._next_min_latency = None
+        self._windows = 0
+        self.peak_limit = int(self._limit)
+    
+    @property
+    def limit(self) -> int:
+        """Current concurrency limit"""
+        return int(self._limit)
+    
+    @property
+    def inflight(self) -> int:
+        """Requests currently holding a slot"""
+        return self._inflight
+    
+    def acquire(self) -> None:
+        """Block the calling thread until a slot is free, then take it"""
+        with self._cond:
+            while self._inflight >= int(self._limit):
+                self._cond.wait()
+            self._inflight += 1
+    
+    async def acquire_async(self) -> None:
+        """Wait without blocking the event loop until a slot is free, then take it"""
+        loop = asyncio.get_running_loop()
+        while True:
+            with self._cond:
+                if self._inflight < int(self._limit):
+                    self._inflight += 1
+                    return
+                waiter = loop.create_future()
+                self._async_waiters.append((loop, waiter))
+            try:
+                await waiter
+            except asyncio.CancelledError:
+                with self._cond:
+                    if (loop, waiter) in self._async_waiters:
+                        self._async_waiters.remove((loop, waiter))
+                    else:
+                        # Already woken for a free slot: pass the wake-up on instead of losing it
+                        self._notify()
+                raise
+    
+    def release(self, latency: float, success: bool) -> None:
+        """Give back a slot and adapt the limit from the request's latency and outcome"""
+        with self._cond:
+            inflight = self._inflight
+            self._inflight -= 1
+            self._adapt(latency, success, inflight)
+            self._notify()
+    
+    def _notify(self) -> None:
+        """Wake as many blocked threads and tasks as there are free slots (lock held)"""
+        free = int(self._limit) - self._inflight
+        if free > 0:
+            self._cond.notify(free)
+            for _ in range(min(free, len(self._async_waiters))):
+                loop, waiter = self._async_waiters.popleft()
+                loop.call_soon_threadsafe(_resolve_waiter, waiter)
+    
+    def _adapt(self, latency: float, success: bool, inflight: int) -> None:
+        self._samples += 1
+        self._peak_inflight = max(self._peak_inflight, inflight)
+        if success:
+            self._successes += 1
+            self._latency_total += latency
+        else:
+            self._failed = True
+        if self._samples < max(self.window, int(self._limit)):
+            return
+        
+        average = self._latency_total / self._successes if self._successes else None
+        failed, peak_inflight = self._failed, self._peak_inflight
+        self._samples = self._successes = self._peak_inflight = 0
+        self._latency_total = 0.0
+        self._failed = False
+        if average is not None:
+            self._next_min_latency = average if self._next_min_latency is None else min(self._next_min_latency, average)
+            if self._min_latency is None or average < self._min_latency:
+                self._min_latency = average
+            self._windows += 1
+            if self._windows >= self.baseline_windows:
+                self._min_latency, self._next_min_latency, self._windows = self._next_min_latency, None, 0
+            elif peak_inflight <= self.min_limit and not failed:
+                # Requests that never overlapped measure the no-load latency by definition
+                self._min_latency = average
+        
+        if failed or average is None:
+            limit = self._limit * self.backoff_ratio
+        elif self.algorithm == "gradient":
+            gradient = max(0.5, min(1.0, self.tolerance * self._min_latency / max(average, 1e-9)))
+            target = self._limit * gradient + math.sqrt(self._limit)
+            limit = self._limit * (1 - self.smoothing) + target * self.smoothing
+        elif average > self.tolerance * self._min_latency:
+            limit = self._limit * self.backoff_ratio
+        elif peak_inflight * 2 >= self._limit:
+            limit = self._limit + 1
+        else:
+            return
+        self._limit = max(float(self.min_limit), min(float(self.max_limit), limit))
+        self.peak_limit = max(self.peak_limit, int(self._limit))
+    
+    def stats(self) -> Dict[str, Any]:
+        """Return the current limit, in-flight count and learned no-load latency"""
+        with self._cond:
+            return {
+                "limit": int(self._limit),
+                "peak_limit": self.peak_limit,
+                "inflight": self._inflight,
+                "min_latency_ms": self._min_latency * 1000 if self._min_latency is not None else None
+            }
+
+def _resolve_waiter(waiter: "asyncio.Future") -> None:
+    """Wake an asyncio task waiting for a concurrency slot unless it was cancelled"""
+    if not waiter.done():
+        waiter.set_result(None)
+
+def _inject_trace_context(tracer: Any, headers: Dict[str, str]) -> None:
+    """Add W3C ``traceparent`` headers for the current span, so gateway traces join the client's"""
+    if tracer is not None:
+        otel_propagate.inject(headers)
+
+def _request_key(path: str, params: Dict[str, Any] = None) -> Hashable:
+    """Build a hashable key identifying a backend call"""
+    return (path, tuple(sorted((params or {}).items())))
+
+def iter_json_array(chunks: Iterable[str]) -> Iterator[Any]:
+    """Incrementally parse a JSON array from text chunks, yielding each element once complete
+    
+    Only the current element is held in memory, so arbitrarily large listings can be
+    consumed with bounded memory. A non-array document (e.g. a single object) is parsed
+    whole and yielded as one item.
+    """
+    decoder = json.JSONDecoder()
+    buffer = ""
+    position = 0
+    is_array = None
+    
+    for chunk in chunks:
+        buffer = buffer[position:] + chunk
+        position = 0
+        if is_array is None:
+            stripped = buffer.lstrip()
+            if not stripped:
+                continue
+            is_array = stripped[0] == "["
+            position = len(buffer) - len(stripped) + 1 if is_array else 0
+        if not is_array:
+            continue
+        
+        while True:
+            while position < len(buffer) and buffer[position] in " \t\r\n,":
+                position += 1
+            if position >= len(buffer):
+                break
+            if buffer[position] == "]":
+                return
+            try:
+                item, end = decoder.raw_decode(buffer, position)
+            except json.JSONDecodeError:
+                break  # Element continues in the next chunk
+            if isinstance(item, (int, float)) and (end == len(buffer) or buffer[end] not in " \t\r\n,]"):
+                break  # A number is only complete once a delimiter follows (1. may become 1.5, 1e 1e3)
+            yield item
+            position = end
+    
+    if is_array is None:
+        return
+    if is_array:
+        raise ValueError("Truncated JSON array in response body")
+    document = json.loads(buffer)
+    if isinstance(document, list):
+        yield from document
+    else:
+        yield document
+
+def split_page(data: Any) -> Tuple[List[Any], Optional[str]]:
+    """Split a page response into its items and the next-page link, if any
+    
+    Understands plain JSON arrays as well as the Azure-style ``{"value": [...], "nextLink": ...}``
+    envelope commonly returned behind API Management.
+    """
+    if isinstance(data, dict) and isinstance(data.get("value"), list):
+        return data["value"], data.get("nextLink")
+    if isinstance(data, list):
+        return data, None
+    return [data], None
+
+def _next_page(items: List[Any], next_link: Optional[str], params: Dict[str, Any],
+               page_size: int) -> Optional[Tuple[str, Optional[Dict[str, Any]]]]:
+    """Work out the (path, params) of the page after the current one, or None on the last page"""
+    if next_link:
+        # Cursor pagination: the link already carries every query parameter
+        return next_link, None
+    # A short page is the last one; a longer one means the server ignored limit and sent everything.
+    # A page reached through a cursor that carries no further link is the last one as well
+    if len(items) != page_size or "page" not in params:
+        return None
+    return "/pets", {**params, "page": params["page"] + 1}
+
+def _first_id(items: List[Any]) -> Any:
+    """ID of a page's first pet, used to notice a server that keeps sending the same page"""
+    return items[0].get("id") if items and isinstance(items[0], dict) else None
+
+def _filter_params(status: str = None, category: str = None) -> Dict[str, Any]:
+    """Query parameters pushing status/category predicates down to the server"""
+    params = {}
+    if status:
+        params["status"] = status
+    if category:
+        params["category"] = category
+    return params
+
+def _list_endpoint(status: str = None, category: str = None) -> str:
+    """Endpoint label (breaker, cache TTL, span name) of a listing filtered by the given predicates"""
+    if status:
+        return "/pets?status"
+    return "/pets?category" if category else "/pets"
+
+def _close_response(future: Future) -> None:
+    """Done-callback releasing the connection of an abandoned hedged request"""
+    if not future.cancelled() and future.exception() is None:
+        future.result().close()
 
 class PetStoreMCPClient:
     """Client for interacting with the Pet Store MCP server"""
     
-    def __init__(self, base_url: str):
+    def __init__(self, base_url: str, pool_maxsize: int = 10, cache: ResponseCache = None,
+                 conditional_requests: bool = True, page_size: int = None,
+                 recorder: LatencyRecorder = None, tracer: Any = None, retry_policy: RetryPolicy = None,
+                 breakers: CircuitBreakers = None, timeout: float = 10.0, hedge_policy: HedgePolicy = None,
+                 rate_limiter: RateLimiter = None, concurrency_limit: AdaptiveConcurrencyLimit = None):
         self.base_url = base_url
         self.session = requests.Session()
+        # Size the keep-alive pool for the number of threads sharing this session
+        adapter = HTTPAdapter(pool_maxsize=pool_maxsize)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
         self.session.headers.update({
             'Content-Type': 'application/json',
             'Accept': 'application/json'
         })
+        # Concurrent identical calls (e.g. from different prompts) share one request
+        self.single_flight = SingleFlight()
+        # Optional response cache consulted before going to the network
+        self.cache = cache
+        # Validators for conditional GETs, so unchanged listings cost a header-only round trip
+        self.validators = ValidatorStore() if conditional_requests else None
+        # When set, listings are fetched with page/limit (or nextLink) pagination
+        self.page_size = page_size
+        # Optional HTTP phase timings (TTFB, download, JSON decode); requests does not expose
+        # DNS/connect/TLS separately, so those are folded into http.ttfb
+        self.recorder = recorder
+        # Optional OpenTelemetry tracer: one client span per HTTP request, propagated to the gateway
+        self.tracer = tracer
+        # Optional retries of transient failures (None makes exactly one attempt per call)
+        self.retry_policy = retry_policy
+        # Optional per-endpoint circuit breakers, so a dead backend fails fast instead of timing out
+        self.breakers = breakers
+        # Seconds to wait for the gateway to connect and respond
+        self.timeout = timeout
+        # Optional hedging: slow GETs get a backup request and the first response wins
+        self.hedge_policy = hedge_policy
+        # Both copies of a hedged request run here, so the caller can return on whichever finishes first
+        self._hedge_executor = ThreadPoolExecutor(max_workers=2 * pool_maxsize) if hedge_policy else None
+        # Optional client-side rate limiting, tuned from the gateway's rate-limit headers
+        self.rate_limiter = rate_limiter
+        # Optional adaptive cap on concurrent HTTP requests, whatever the number of caller threads
+        self.concurrency_limit = concurrency_limit
+    
+    def _limited_get(self, endpoint: str, url: str, **kwargs: Any) -> requests.Response:
+        """Send one GET within the rate and concurrency limits, feeding the outcome back to both"""
+        limit = self.concurrency_limit
+        if self.rate_limiter is not None:
+            self.rate_limiter.acquire(endpoint)
+        if limit is not None:
+            limit.acquire()
+        started = time.perf_counter()
+        success = False
+        try:
+            response = self.session.get(url, timeout=self.timeout, **kwargs)
+            success = response.status_code != 429 and response.status_code < 500
+        finally:
+            duration = time.perf_counter() - started
+            if limit is not None:
+                limit.release(duration, success)
+        if self.recorder is not None and not kwargs.get("stream"):
+            # Timed per attempt, so retry backoff and rate/concurrency waits stay out of both stages;
+            # elapsed stops once the response headers are parsed, the rest is the body download
+            ttfb = response.elapsed.total_seconds()
+            self.recorder.record("http.ttfb", ttfb)
+            self.recorder.record("http.download", max(0.0, duration - ttfb))
+        if self.rate_limiter is not None:
+            self.rate_limiter.update(response.status_code, response.headers)
+        return response
+    
+    def _request(self, endpoint: str, url: str, params: Dict[str, Any] = None, headers: Dict[str, str] = None,
+                 stream: bool = False) -> requests.Response:
+        """Perform one GET attempt, hedged with a backup request when the first one is slow
+        
+        requests cannot abort a request in flight, so the losing copy is left to finish in
+        the background and its response is closed as soon as it arrives.
+        """
+        def send() -> requests.Response:
+            return self._limited_get(endpoint, url, params=params, headers=headers, stream=stream)
+        
+        policy = self.hedge_policy
+        if policy is None or stream:
+            return send()
+        policy.budget.deposit()
+        started = time.perf_counter()
+        delay = policy.delay_for(endpoint)
+        if delay is None:
+            response = send()
+            policy.observe(endpoint, time.perf_counter() - started)
+            return response
+        
+        primary = self._hedge_executor.submit(send)
+        done, _ = wait([primary], timeout=delay)
+        if done or not policy.try_hedge():
+            response = primary.result()
+            policy.observe(endpoint, time.perf_counter() - started)
+            return response
+        
+        backup = self._hedge_executor.submit(send)
+        futures = [primary, backup]
+        winner = None
+        while futures:
+            done, pending = wait(futures, return_when=FIRST_COMPLETED)
+            winner = next((future for future in done if future.exception() is None), None)
+            if winner is not None:
+                break
+            futures = list(pending)
+        for future in (primary, backup):
+            if future is not winner:
+                future.add_done_callback(_close_response)
+        if winner is None:
+            return primary.result()  # Both copies failed: raise the primary's error
+        if winner is backup:
+            policy.record_backup_win()
+        policy.observe(endpoint, time.perf_counter() - started)
+        return winner.result()
+    
+    def _send(self, endpoint: str, url: str, params: Dict[str, Any] = None, headers: Dict[str, str] = None,
+              stream: bool = False) -> requests.Response:
+        """Send a GET through the endpoint's circuit breaker, retrying transient failures per the retry policy"""
+        policy = self.retry_policy
+        breaker = self.breakers.get(endpoint) if self.breakers is not None else None
+        if policy is not None:
+            policy.budget.deposit()
+        attempt = 1
+        while True:
+            if breaker is not None and not breaker.allow():
+                raise CircuitOpenError(f"Circuit breaker open for {endpoint}, failing fast")
+            try:
+                response = self._request(endpoint, url, params=params, headers=headers, stream=stream)
+            except (requests.ConnectionError, requests.Timeout) as e:
+                if breaker is not None:
+                    breaker.record(False)
+                delay = policy.next_delay("GET", attempt) if policy is not None else None
+                if delay is None:
+                    raise
+                reason = str(e)
+            except BaseException:
+                # Includes KeyboardInterrupt, which must not leave a half-open trial slot taken
+                if breaker is not None:
+                    breaker.release()
+                raise
+            else:
+                if breaker is not None:
+                    breaker.record(response.status_code < 500)
+                delay = (policy.next_delay("GET", attempt, response.status_code, response.headers)
+                         if policy is not None else None)
+                if delay is None:
+                    return response
+                reason = f"HTTP {response.status_code}"
+                response.close()
+            logger.warning(f"Retrying GET {url} in {delay:.2f}s (attempt {attempt} failed: {reason})")
+            time.sleep(delay)
+            attempt += 1
+    
+    def _get(self, endpoint: str, path: str, params: Dict[str, Any] = None) -> Any:
+        """Issue a GET against the gateway, serving from cache and coalescing identical in-flight calls"""
+        key = _request_key(path, params)
+        if self.cache is not None:
+            cached = self.cache.get(key)
+            if cached is not None:
+                return cached
+        return self.single_flight.do(key, lambda: self._fetch(endpoint, key, path, params))
+    
+    def _fetch(self, endpoint: str, key: Hashable, path: str, params: Dict[str, Any] = None) -> Any:
+        """Perform the (conditional) HTTP request, decode the JSON body and populate the cache"""
+        validator = self.validators.get(key) if self.validators is not None else None
+        headers = ValidatorStore.conditional_headers(validator) if validator else {}
+        url = path if path.startswith(("http://", "https://")) else f"{self.base_url}{path}"
+        with _span(self.tracer, f"GET {endpoint}", {"http.request.method": "GET", "url.full": url}, client=True) as span:
+            _inject_trace_context(self.tracer, headers)
+            response = self._send(endpoint, url, params=params, headers=headers or None)
+            span.set_attribute("http.response.status_code", response.status_code)
+            if self.concurrency_limit is not None:
+                span.set_attribute("pet_store.concurrency_limit", self.concurrency_limit.limit)
+            
+            if response.status_code == 304 and validator:
+                self.validators.record_not_modified()
+                _, _, data, size = validator
+            else:
+                response.raise_for_status()
+                with _timed(self.recorder, "json.decode"):
+                    data = response.json()
+                size = len(response.content)
+                etag = response.headers.get("ETag")
+                last_modified = response.headers.get("Last-Modified")
+                if self.validators is not None and (etag or last_modified):
+                    self.validators.set(key, etag, last_modified, data, size)
+            span.set_attributes({"http.response.body.size": len(response.content), **_result_attributes(data)})
+        
+        if self.cache is not None:
+            self.cache.set(key, data, size=size, endpoint=endpoint)
+        return data
     
     def get_pets(self) -> Dict[str, Any]:
         """Get all pets from the pet store"""
         try:
+            if self.page_size:
+                return self._get_all_pages()
             # Since this is an SSE endpoint, we'll try to make a simple GET request first
-            response = self.session.get(f"{self.base_url}/pets", timeout=10)
-            response.raise_for_status()
-            return response.json()
+            return self._get("/pets", "/pets")
         except Exception as e:
             logger.error(f"Error getting pets: {e}")
             return {"error": str(e)}
     
+    def iter_pets(self, status: str = None, chunk_size: int = 64 * 1024,
+                  category: str = None) -> Iterator[Dict[str, Any]]:
+        """Stream pets (optionally filtered by status and category), parsing the body incrementally
+        
+        Returns an iterator that yields pets as they are decoded from the response body, so
+        huge listings never have to be held in memory. Connection and HTTP errors are
+        reported up front as ``{"error": ...}``. Streaming bypasses the cache and
+        request coalescing.
+        """
+        if self.page_size:
+            # Paged listings stream page by page; the first page is fetched eagerly so that
+            # errors are reported the same way as for a single streamed response
+            pages = self.iter_pet_pages(status, category=category)
+            try:
+                first_page = next(pages, [])
+            except Exception as e:
+                logger.error(f"Error streaming pets: {e}")
+                return {"error": str(e)}
+            return itertools.chain(first_page, itertools.chain.from_iterable(pages))
+        
+        params = _filter_params(status, category) or None
+        try:
+            response = self._send(_list_endpoint(status, category), f"{self.base_url}/pets",
+                                  params=params, stream=True)
+            response.raise_for_status()
+        except Exception as e:
+            logger.error(f"Error streaming pets: {e}")
+            return {"error": str(e)}
+        pets = self._iter_response_items(response, chunk_size)
+        return filter_pets(pets, status, category) if params else pets
+    
+    def iter_pet_pages(self, status: str = None, page_size: int = None,
+                       category: str = None) -> Iterator[List[Dict[str, Any]]]:
+        """Yield pages of pets, prefetching the next page while the caller works on the current one"""
+        page_size = page_size or self.page_size or 100
+        endpoint = _list_endpoint(status, category)
+        params = {"page": 1, "limit": page_size, **_filter_params(status, category)}
+        
+        def fetch_page(path: str, page_params: Optional[Dict[str, Any]],
+                       previous_id: Any) -> Tuple[List[Any], Any, Any]:
+            items, next_link = split_page(self._get(endpoint, path, page_params))
+            first_id = _first_id(items)
+            if first_id is not None and first_id == previous_id:
+                # The server ignored the page parameter and sent the previous page again
+                logger.warning(f"Page {(page_params or {}).get('page')} repeats the previous page, "
+                               f"stopping; the server may be ignoring the page parameter")
+                return [], None, first_id
+            return items, _next_page(items, next_link, page_params or {}, page_size), first_id
+        
+        with ThreadPoolExecutor(max_workers=1) as prefetcher:
+            pending = prefetcher.submit(fetch_page, "/pets", params, None)
+            while pending is not None:
+                items, next_request, first_id = pending.result()
+                pending = prefetcher.submit(fetch_page, *next_request, first_id) if next_request else None
+                # Page boundaries come from the unfiltered item count, so filter only what is yielded
+                if status or category:
+                    items = list(filter_pets(items, status, category))
+                if items:
+                    yield items
+    
+    def _get_all_pages(self, status: str = None, category: str = None) -> List[Dict[str, Any]]:
+        """Collect every page of a listing into a single list"""
+        return [pet for page in self.iter_pet_pages(status, category=category) for pet in page]
+    
+    def _iter_response_items(self, response: requests.Response, chunk_size: int) -> Iterator[Any]:
+        """Decode a streamed JSON array response item by item, closing it when done"""
+        try:
+            decoder = codecs.getincrementaldecoder(response.encoding or "utf-8")()
+            chunks = (decoder.decode(chunk) for chunk in response.iter_content(chunk_size))
+            yield from iter_json_array(chunks)
+        finally:
+            response.close()
+    
     def get_pet_by_id(self, pet_id: int) -> Dict[str, Any]:
         """Get a specific pet by ID"""
         try:
-            response = self.session.get(f"{self.base_url}/pets/{pet_id}", timeout=10)
-            response.raise_for_status()
-            return response.json()
+            return self._get("/pets/{id}", f"/pets/{pet_id}")
         except Exception as e:
             logger.error(f"Error getting pet {pet_id}: {e}")
             return {"error": str(e)}
@@ -61,227 +1201,823 @@ class PetStoreMCPClient:
     def search_pets_by_status(self, status: str) -> Dict[str, Any]:
         """Search pets by status"""
         try:
-            response = self.session.get(f"{self.base_url}/pets", params={"status": status}, timeout=10)
-            response.raise_for_status()
-            return response.json()
+            if self.page_size:
+                return self._get_all_pages(status)
+            return self._get("/pets?status", "/pets", params={"status": status})
         except Exception as e:
             logger.error(f"Error searching pets by status {status}: {e}")
             return {"error": str(e)}
+    
+    def search_pets(self, status: str = None, category: str = None) -> Dict[str, Any]:
+        """Search pets by status and/or category, filtering on the server where supported
+        
+        The predicates are sent as query parameters so only matching pets cross the wire;
+        servers that ignore them are covered by a single client-side filtering pass.
+        """
+        try:
+            if self.page_size:
+                return self._get_all_pages(status, category)
+            params = _filter_params(status, category)
+            data = self._get(_list_endpoint(status, category), "/pets", params=params or None)
+            if isinstance(data, list):
+                data = list(filter_pets(data, status, category))
+            return data
+        except Exception as e:
+            logger.error(f"Error searching pets (status={status}, category={category}): {e}")
+            return {"error": str(e)}
 
-class AIOrchestrator:
-    """Simple AI orchestrator that processes prompts and calls appropriate MCP functions"""
+class AsyncPetStoreMCPClient:
+    """Asyncio client for the Pet Store MCP server with a pooled HTTP/1.1 + HTTP/2 transport
+    
+    Mirrors the PetStoreMCPClient method surface with ``async def`` methods. All calls share
+    one bounded connection pool with keep-alive, and when HTTP/2 is available many requests
+    are multiplexed over the same connection, so hundreds of tool calls can be in flight at once.
+    """
     
-    def __init__(self, mcp_client: PetStoreMCPClient):
-        self.mcp_client = mcp_client
+    # httpcore trace events mapped to latency stages (DNS resolution is part of connect_tcp)
+    TRACE_STAGES = {
+        "connect_tcp": "http.connect",
+        "start_tls": "http.tls",
+        "receive_response_headers": "http.ttfb",
+        "receive_response_body": "http.download"
+    }
     
-    def process_prompt(self, prompt: str) -> str:
-        """Process a user prompt and return a formatted response"""
-        prompt_lower = prompt.lower()
+    def __init__(self, base_url: str, max_connections: int = 100, max_keepalive_connections: int = 20,
+                 keepalive_expiry: float = 30.0, http2: bool = True, timeout: float = 10.0,
+                 recorder: LatencyRecorder = None, tracer: Any = None, retry_policy: RetryPolicy = None,
+                 breakers: CircuitBreakers = None, hedge_policy: HedgePolicy = None,
+                 rate_limiter: RateLimiter = None, concurrency_limit: AdaptiveConcurrencyLimit = None,
+                 transport: "httpx.AsyncBaseTransport" = None):
+        if httpx is None:
+            raise ImportError("AsyncPetStoreMCPClient requires httpx: pip install 'httpx[http2]'")
+        if http2:
+            try:
+                import h2  # noqa: F401
+            except ImportError:
+                logger.warning("h2 is not installed, falling back to HTTP/1.1 for the async client")
+                http2 = False
         
-        # Simple keyword-based routing
-        if "all pets" in prompt_lower or "list pets" in prompt_lower:
-            return self._handle_get_all_pets()
-        elif "pet" in prompt_lower and ("id" in prompt_lower or any(char.isdigit() for char in prompt)):
-            # Extract pet ID from prompt
-            pet_id = self._extract_pet_id(prompt)
-            if pet_id:
-                return self._handle_get_pet_by_id(pet_id)
+        self.base_url = base_url
+        self.client = httpx.AsyncClient(
+            headers={
+                'Content-Type': 'application/json',
+                'Accept': 'application/json'
+            },
+            http2=http2,
+            limits=httpx.Limits(
+                max_connections=max_connections,
+                max_keepalive_connections=max_keepalive_connections,
+                keepalive_expiry=keepalive_expiry
+            ),
+            # Calls queued behind a full pool wait for a free connection instead of failing
+            timeout=httpx.Timeout(timeout, pool=None),
+            # A custom transport (e.g. httpx.MockTransport) replaces the pooled one
+            transport=transport
+        )
+        self.single_flight = AsyncSingleFlight()
+        # Optional HTTP phase timings collected through httpcore's trace extension
+        self.recorder = recorder
+        # Optional OpenTelemetry tracer: one client span per HTTP request, propagated to the gateway
+        self.tracer = tracer
+        # Optional retries of transient failures (None makes exactly one attempt per call)
+        self.retry_policy = retry_policy
+        # Optional per-endpoint circuit breakers, so a dead backend fails fast instead of timing out
+        self.breakers = breakers
+        # Optional hedging: slow GETs get a backup request and the first response wins
+        self.hedge_policy = hedge_policy
+        # Optional client-side rate limiting, tuned from the gateway's rate-limit headers
+        self.rate_limiter = rate_limiter
+        # Optional adaptive cap on concurrent HTTP requests, however many tasks are calling
+        self.concurrency_limit = concurrency_limit
+    
+    async def _limited_get(self, endpoint: str, url: str, **kwargs: Any) -> "httpx.Response":
+        """Send one GET within the rate and concurrency limits, feeding the outcome back to both"""
+        limit = self.concurrency_limit
+        if self.rate_limiter is not None:
+            await self.rate_limiter.acquire_async(endpoint)
+        if limit is not None:
+            await limit.acquire_async()
+        started = time.perf_counter()
+        success = False
+        try:
+            response = await self.client.get(url, **kwargs)
+            success = response.status_code != 429 and response.status_code < 500
+        finally:
+            if limit is not None:
+                limit.release(time.perf_counter() - started, success)
+        if self.rate_limiter is not None:
+            self.rate_limiter.update(response.status_code, response.headers)
+        return response
+    
+    async def _request(self, endpoint: str, url: str, params: Dict[str, Any] = None,
+                       headers: Dict[str, str] = None, extensions: Dict[str, Any] = None) -> "httpx.Response":
+        """Perform one GET attempt, hedged with a backup request when the first one is slow"""
+        def send() -> "asyncio.Task":
+            return asyncio.ensure_future(self._limited_get(endpoint, url, params=params, headers=headers,
+                                                           extensions=extensions))
+        
+        policy = self.hedge_policy
+        if policy is None:
+            return await send()
+        policy.budget.deposit()
+        started = time.perf_counter()
+        delay = policy.delay_for(endpoint)
+        primary = send()
+        tasks = [primary]
+        winner = None
+        try:
+            if delay is not None:
+                await asyncio.wait({primary}, timeout=delay)
+            if delay is None or primary.done() or not policy.try_hedge():
+                response = await primary
+                policy.observe(endpoint, time.perf_counter() - started)
+                return response
+            
+            backup = send()
+            tasks.append(backup)
+            pending = {primary, backup}
+            while pending and winner is None:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                winner = next((task for task in done if task.exception() is None), None)
+        finally:
+            # Runs on every exit, including the caller being cancelled mid-wait.
+            # Unlike requests, httpx requests can be cancelled in flight
+            for task in tasks:
+                if not task.done():
+                    task.cancel()
+                elif not task.cancelled():
+                    task.exception()  # Mark a losing copy's error as retrieved
+        if winner is None:
+            return primary.result()  # Both copies failed: raise the primary's error
+        if winner is backup:
+            policy.record_backup_win()
+        policy.observe(endpoint, time.perf_counter() - started)
+        return winner.result()
+    
+    async def _send(self, endpoint: str, url: str, params: Dict[str, Any] = None, headers: Dict[str, str] = None,
+                    extensions: Dict[str, Any] = None) -> "httpx.Response":
+        """Send a GET through the endpoint's circuit breaker, retrying transient failures per the retry policy"""
+        policy = self.retry_policy
+        breaker = self.breakers.get(endpoint) if self.breakers is not None else None
+        if policy is not None:
+            policy.budget.deposit()
+        attempt = 1
+        while True:
+            if breaker is not None and not breaker.allow():
+                raise CircuitOpenError(f"Circuit breaker open for {endpoint}, failing fast")
+            try:
+                response = await self._request(endpoint, url, params=params, headers=headers, extensions=extensions)
+            except httpx.TransportError as e:
+                if breaker is not None:
+                    breaker.record(False)
+                delay = policy.next_delay("GET", attempt) if policy is not None else None
+                if delay is None:
+                    raise
+                reason = str(e) or type(e).__name__
+            except BaseException:
+                # Includes cancellation, which must not leave a half-open trial slot taken
+                if breaker is not None:
+                    breaker.release()
+                raise
             else:
-                return "🤔 I couldn't find a valid pet ID in your request. Please specify a pet ID number."
-        elif "pending" in prompt_lower:
-            return self._handle_get_pending_pets()
-        elif "available" in prompt_lower or "adoption" in prompt_lower:
-            return self._handle_get_available_pets()
-        elif "sold" in prompt_lower:
-            return self._handle_get_sold_pets()
+                if breaker is not None:
+                    breaker.record(response.status_code < 500)
+                delay = (policy.next_delay("GET", attempt, response.status_code, response.headers)
+                         if policy is not None else None)
+                if delay is None:
+                    return response
+                reason = f"HTTP {response.status_code}"
+            logger.warning(f"Retrying GET {url} in {delay:.2f}s (attempt {attempt} failed: {reason})")
+            await asyncio.sleep(delay)
+            attempt += 1
+    
+    async def __aenter__(self) -> "AsyncPetStoreMCPClient":
+        return self
+    
+    async def __aexit__(self, *exc_info) -> None:
+        await self.aclose()
+    
+    async def aclose(self) -> None:
+        """Close the pooled connections"""
+        await self.client.aclose()
+    
+    async def _get(self, path: str, params: Dict[str, Any] = None) -> Any:
+        """Issue a GET against the gateway, coalescing identical in-flight calls"""
+        return await self.single_flight.do(_request_key(path, params), lambda: self._fetch(path, params))
+    
+    async def _fetch(self, path: str, params: Dict[str, Any] = None) -> Any:
+        """Perform the HTTP request and decode the JSON body"""
+        url = path if path.startswith(("http://", "https://")) else f"{self.base_url}{path}"
+        extensions = {"trace": self._tracer()} if self.recorder is not None else None
+        if path.startswith("/pets/"):
+            endpoint = "/pets/{id}"
         else:
-            return self._handle_general_query(prompt)
-    
-    def _extract_pet_id(self, prompt: str) -> int:
-        """Extract pet ID from prompt"""
-        import re
-        numbers = re.findall(r'\d+', prompt)
-        return int(numbers[0]) if numbers else None
-    
-    def _handle_get_all_pets(self) -> str:
-        """Handle request to get all pets"""
-        result = self.mcp_client.get_pets()
-        if "error" in result:
-            return f"❌ Sorry, I couldn't fetch the pets: {result['error']}"
-        
-        return self._format_pets_response(result, "🐾 Here are all the pets in our store:")
+            endpoint = _list_endpoint(params.get("status"), params.get("category")) if params else "/pets"
+        with _span(self.tracer, f"GET {endpoint}", {"http.request.method": "GET", "url.full": url}, client=True) as span:
+            headers: Dict[str, str] = {}
+            _inject_trace_context(self.tracer, headers)
+            response = await self._send(endpoint, url, params=params, headers=headers or None, extensions=extensions)
+            span.set_attribute("http.response.status_code", response.status_code)
+            if self.concurrency_limit is not None:
+                span.set_attribute("pet_store.concurrency_limit", self.concurrency_limit.limit)
+            response.raise_for_status()
+            with _timed(self.recorder, "json.decode"):
+                data = response.json()
+            span.set_attributes({"http.response.body.size": len(response.content), **_result_attributes(data)})
+            return data
     
-    def _handle_get_pet_by_id(self, pet_id: int) -> str:
-        """Handle request to get a specific pet"""
-        result = self.mcp_client.get_pet_by_id(pet_id)
-        if "error" in result:
-            return f"❌ Sorry, I couldn't find pet {pet_id}: {result['error']}"
+    def _tracer(self) -> Callable[[str, Dict[str, Any]], Awaitable[None]]:
+        """Build a per-request httpcore trace callback that records connection and transfer phases"""
+        started: Dict[str, float] = {}
         
-        return self._format_single_pet_response(result)
-    
-    def _handle_get_available_pets(self) -> str:
-        """Handle request to get available pets"""
-        result = self.mcp_client.search_pets_by_status("available")
-        if "error" in result:
-            return f"❌ Sorry, I couldn't fetch available pets: {result['error']}"
+        async def trace(event_name: str, info: Dict[str, Any]) -> None:
+            # Events look like "connection.connect_tcp.started" or "http2.receive_response_body.complete"
+            name, _, phase = event_name.rpartition(".")
+            stage = self.TRACE_STAGES.get(name.rpartition(".")[2])
+            if stage is None:
+                return
+            if phase == "started":
+                started[stage] = time.perf_counter()
+            elif phase in ("complete", "failed") and stage in started:
+                self.recorder.record(stage, time.perf_counter() - started.pop(stage))
         
-        return self._format_pets_response(result, "🟢 Here are the pets available for adoption:")
+        return trace
     
-    def _handle_get_sold_pets(self) -> str:
-        """Handle request to get sold pets"""
-        result = self.mcp_client.search_pets_by_status("sold")
-        if "error" in result:
-            return f"❌ Sorry, I couldn't fetch sold pets: {result['error']}"
+    async def get_pets(self) -> Dict[str, Any]:
+        """Get all pets from the pet store"""
+        try:
+            return await self._get("/pets")
+        except Exception as e:
+            logger.error(f"Error getting pets: {e}")
+            return {"error": str(e)}
+    
+    async def get_pet_by_id(self, pet_id: int) -> Dict[str, Any]:
+        """Get a specific pet by ID"""
+        try:
+            return await self._get(f"/pets/{pet_id}")
+        except Exception as e:
+            logger.error(f"Error getting pet {pet_id}: {e}")
+            return {"error": str(e)}
+    
+    async def search_pets_by_status(self, status: str) -> Dict[str, Any]:
+        """Search pets by status"""
+        try:
+            return await self._get("/pets", params={"status": status})
+        except Exception as e:
+            logger.error(f"Error searching pets by status {status}: {e}")
+            return {"error": str(e)}
+    
+    async def search_pets(self, status: str = None, category: str = None) -> Dict[str, Any]:
+        """Search pets by status and/or category, filtering on the server where supported"""
+        try:
+            data = await self._get("/pets", params=_filter_params(status, category) or None)
+            if isinstance(data, list):
+                data = list(filter_pets(data, status, category))
+            return data
+        except Exception as e:
+            logger.error(f"Error searching pets (status={status}, category={category}): {e}")
+            return {"error": str(e)}
+    
+    async def iter_pet_pages(self, status: str = None, page_size: int = 100,
+                             category: str = None) -> AsyncIterator[List[Dict[str, Any]]]:
+        """Yield pages of pets, prefetching the next page while the caller works on the current one"""
+        params = {"page": 1, "limit": page_size, **_filter_params(status, category)}
+        
+        async def fetch_page(path: str, page_params: Optional[Dict[str, Any]],
+                             previous_id: Any) -> Tuple[List[Any], Any, Any]:
+            items, next_link = split_page(await self._get(path, page_params))
+            first_id = _first_id(items)
+            if first_id is not None and first_id == previous_id:
+                # The server ignored the page parameter and sent the previous page again
+                logger.warning(f"Page {(page_params or {}).get('page')} repeats the previous page, "
+                               f"stopping; the server may be ignoring the page parameter")
+                return [], None, first_id
+            return items, _next_page(items, next_link, page_params or {}, page_size), first_id
         
-        return self._format_pets_response(result, "🔴 Here are the pets that have been sold:")
+        pending = asyncio.ensure_future(fetch_page("/pets", params, None))
+        try:
+            while pending is not None:
+                items, next_request, first_id = await pending
+                pending = asyncio.ensure_future(fetch_page(*next_request, first_id)) if next_request else None
+                # Page boundaries come from the unfiltered item count, so filter only what is yielded
+                if status or category:
+                    items = list(filter_pets(items, status, category))
+                if items:
+                    yield items
+        finally:
+            if pending is not None:
+                pending.cancel()
+
+class MCPError(Exception):
+    """Raised when the MCP server answers a JSON-RPC request with an error"""
+
+class MCPSSESession:
+    """Persistent MCP session over the gateway's Server-Sent Events endpoint
+    
+    Opens one long-lived event stream, learns the message endpoint from the server's
+    ``endpoint`` event, performs the MCP initialize handshake once and then correlates
+    JSON-RPC responses arriving on the stream with their requests by id. Any number of
+    requests can be in flight at the same time over the single session.
+    """
+    
+    PROTOCOL_VERSION = "2024-11-05"
+    
+    def __init__(self, sse_url: str, client: "httpx.AsyncClient", timeout: float = 10.0):
+        self.sse_url = sse_url
+        self.client = client
+        self.timeout = timeout
+        self.server_info: Dict[str, Any] = {}
+        self._ids = itertools.count(1)
+        self._pending: Dict[int, asyncio.Future] = {}
+        self._endpoint: asyncio.Future = None
+        self._reader: asyncio.Task = None
+        self._initialized = False
+    
+    @property
+    def connected(self) -> bool:
+        """Whether the handshake completed and the event stream is still being read"""
+        return self._initialized and self._streaming
     
-    def _handle_get_pending_pets(self) -> str:
-        """Handle request to get pending pets"""
-        result = self.mcp_client.search_pets_by_status("pending")
-        if "error" in result:
-            return f"❌ Sorry, I couldn't fetch pending pets: {result['error']}"
+    @property
+    def _streaming(self) -> bool:
+        return self._reader is not None and not self._reader.done()
+    
+    async def connect(self) -> None:
+        """Open the event stream and perform the MCP initialize handshake
         
-        return self._format_pets_response(result, "🟡 Here are the pets with pending adoptions:")
-    
-    def _handle_general_query(self, prompt: str) -> str:
-        """Handle general queries about the pet store"""
-        return f"""🐕 Welcome to our Pet Store! 🐱
-
-I can help you with:
-• 📋 List all pets: "Show me all pets"
-• 🔍 Find a specific pet: "Show me pet with ID 123"
-• 🟢 Available pets: "What pets are available?"
-• 🟡 Pending adoptions: "Which pets are pending?"
-• 🔴 Sold pets: "What pets have been sold?"
-
-Your request: "{prompt}"
-Try rephrasing your question using one of the examples above! 😊"""
-    
-    def _format_pets_response(self, data: Dict[str, Any], header: str) -> str:
-        """Format a list of pets into a nice response"""
-        if not data or (isinstance(data, list) and len(data) == 0):
-            return f"{header}\n\n😔 No pets found."
+        On any failure the stream is closed again, so the next connect starts from scratch.
+        """
+        loop = asyncio.get_running_loop()
+        self._initialized = False
+        self._endpoint = loop.create_future()
+        self._reader = asyncio.create_task(self._read_events())
+        try:
+            try:
+                await asyncio.wait_for(asyncio.shield(self._endpoint), self.timeout)
+            except asyncio.TimeoutError:
+                raise MCPError(f"No endpoint event from {self.sse_url} within {self.timeout:g}s") from None
+            self.server_info = await self.request("initialize", {
+                "protocolVersion": self.PROTOCOL_VERSION,
+                "capabilities": {},
+                "clientInfo": {"name": "pet-store-mcp-demo", "version": "1.0.0"}
+            })
+            await self.notify("notifications/initialized")
+        except BaseException:
+            await self.aclose()
+            raise
+        self._initialized = True
+    
+    async def aclose(self) -> None:
+        """Close the event stream and fail any requests still waiting for a response"""
+        self._initialized = False
+        if self._reader:
+            self._reader.cancel()
+            try:
+                await self._reader
+            except (asyncio.CancelledError, Exception):
+                pass
+            self._reader = None
+        if self._endpoint is not None:
+            if not self._endpoint.done():
+                self._endpoint.cancel()
+            elif not self._endpoint.cancelled():
+                self._endpoint.exception()  # Mark a stream failure as retrieved
+        self._fail_pending(MCPError("MCP session closed"))
+    
+    async def _read_events(self) -> None:
+        """Read the event stream and dispatch each complete event"""
+        try:
+            async with self.client.stream("GET", self.sse_url, headers={"Accept": "text/event-stream"},
+                                          timeout=httpx.Timeout(self.timeout, read=None)) as response:
+                response.raise_for_status()
+                event, data = "message", []
+                async for line in response.aiter_lines():
+                    if not line:
+                        if data:
+                            self._dispatch(event, "\n".join(data))
+                        event, data = "message", []
+                    elif not line.startswith(":"):
+                        field, _, value = line.partition(":")
+                        value = value[1:] if value.startswith(" ") else value
+                        if field == "event":
+                            event = value
+                        elif field == "data":
+                            data.append(value)
+            error = MCPError("MCP event stream ended")
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.error(f"MCP event stream failed: {e}")
+            error = e
+        if self._endpoint and not self._endpoint.done():
+            self._endpoint.set_exception(error)
+        self._fail_pending(error)
+    
+    def _dispatch(self, event: str, data: str) -> None:
+        """Handle one Server-Sent Event"""
+        if event == "endpoint":
+            if not self._endpoint.done():
+                self._endpoint.set_result(urljoin(self.sse_url, data))
+            return
+        if event != "message":
+            return
         
-        pets = data if isinstance(data, list) else [data]
-        response = f"{header}\n\n"
+        try:
+            message = json.loads(data)
+        except ValueError:
+            logger.warning(f"Ignoring malformed MCP message: {data[:200]}")
+            return
         
-        for i, pet in enumerate(pets, 1):
-            pet_emoji = self._get_pet_emoji(pet.get('category', {}).get('name', ''))
-            status_emoji = self._get_status_emoji(pet.get('status', ''))
-            
-            response += f"{pet_emoji} **Pet #{pet.get('id', 'Unknown')}**: {pet.get('name', 'Unnamed')}\n"
-            response += f"   📂 Category: {pet.get('category', {}).get('name', 'Unknown')}\n"
-            response += f"   {status_emoji} Status: {pet.get('status', 'Unknown').title()}\n"
-            
-            if pet.get('tags'):
-                tags = ', '.join([tag.get('name', '') for tag in pet.get('tags', [])])
-                response += f"   🏷️  Tags: {tags}\n"
-            
-            response += "\n"
+        if "method" in message:
+            # Server-initiated request or notification; only ping expects an answer
+            if message["method"] == "ping" and "id" in message:
+                asyncio.create_task(self._send({"jsonrpc": "2.0", "id": message["id"], "result": {}}))
+            return
         
-        return response
+        future = self._pending.get(message.get("id"))
+        if future and not future.done():
+            future.set_result(message)
     
-    def _format_single_pet_response(self, pet: Dict[str, Any]) -> str:
-        """Format a single pet into a detailed response"""
-        pet_emoji = self._get_pet_emoji(pet.get('category', {}).get('name', ''))
-        status_emoji = self._get_status_emoji(pet.get('status', ''))
-        
-        response = f"{pet_emoji} **Pet Details** {pet_emoji}\n\n"
-        response += f"🆔 ID: {pet.get('id', 'Unknown')}\n"
-        response += f"📛 Name: {pet.get('name', 'Unnamed')}\n"
-        response += f"📂 Category: {pet.get('category', {}).get('name', 'Unknown')}\n"
-        response += f"{status_emoji} Status: {pet.get('status', 'Unknown').title()}\n"
+    def _fail_pending(self, error: Exception) -> None:
+        for future in self._pending.values():
+            if not future.done():
+                future.set_exception(error)
+        self._pending.clear()
+    
+    async def _send(self, message: Dict[str, Any]) -> None:
+        """POST a JSON-RPC message to the session's message endpoint"""
+        response = await self.client.post(self._endpoint.result(), json=message)
+        response.raise_for_status()
+    
+    async def notify(self, method: str, params: Dict[str, Any] = None) -> None:
+        """Send a JSON-RPC notification (no response expected)"""
+        message = {"jsonrpc": "2.0", "method": method}
+        if params is not None:
+            message["params"] = params
+        await self._send(message)
+    
+    async def request(self, method: str, params: Dict[str, Any] = None) -> Any:
+        """Send a JSON-RPC request and wait for the response with the matching id"""
+        if not self._streaming:
+            raise MCPError("MCP session is not connected")
+        request_id = next(self._ids)
+        future = asyncio.get_running_loop().create_future()
+        self._pending[request_id] = future
+        try:
+            await self._send({"jsonrpc": "2.0", "id": request_id, "method": method, "params": params or {}})
+            try:
+                message = await asyncio.wait_for(future, self.timeout)
+            except asyncio.TimeoutError:
+                raise MCPError(f"No response to MCP {method} within {self.timeout:g}s") from None
+        finally:
+            self._pending.pop(request_id, None)
         
-        if pet.get('tags'):
-            tags = ', '.join([tag.get('name', '') for tag in pet.get('tags', [])])
-            response += f"🏷️  Tags: {tags}\n"
+        if "error" in message:
+            raise MCPError(message["error"].get("message", str(message["error"])))
+        return message.get("result")
+    
+    async def list_tools(self) -> List[Dict[str, Any]]:
+        """List the tools exposed by the MCP server"""
+        result = await self.request("tools/list")
+        return result.get("tools", [])
+    
+    async def call_tool(self, name: str, arguments: Dict[str, Any] = None) -> Any:
+        """Call an MCP tool and decode its content (JSON text is parsed)"""
+        result = await self.request("tools/call", {"name": name, "arguments": arguments or {}})
+        texts = [item.get("text", "") for item in result.get("content", []) if item.get("type") == "text"]
+        text = "".join(texts)
+        if result.get("isError"):
+            raise MCPError(text or f"Tool {name} failed")
+        try:
+            return json.loads(text)
+        except ValueError:
+            return text
+
+class SSEPetStoreMCPClient(AsyncPetStoreMCPClient):
+    """Async Pet Store client that calls MCP tools over a single persistent SSE session
+    
+    Uses the same pooled transport as AsyncPetStoreMCPClient, but instead of REST GETs
+    every call is a ``tools/call`` multiplexed over one MCPSSESession, so there is no
+    per-call connection setup or handshake.
+    """
+    
+    # Tool names published by the gateway for each client method
+    DEFAULT_TOOLS = {
+        "get_pets": "listPets",
+        "get_pet_by_id": "getPetById",
+        "search_pets_by_status": "findPetsByStatus"
+    }
+    
+    def __init__(self, base_url: str, tools: Dict[str, str] = None, **transport_options):
+        super().__init__(base_url, **transport_options)
+        self.tools = {**self.DEFAULT_TOOLS, **(tools or {})}
+        self.session = MCPSSESession(f"{base_url}/sse", self.client,
+                                     timeout=transport_options.get("timeout", 10.0))
+        self._connect_lock: asyncio.Lock = None
+    
+    async def __aenter__(self) -> "SSEPetStoreMCPClient":
+        await self.connect()
+        return self
+    
+    async def connect(self) -> None:
+        """Open the MCP session once; concurrent callers wait for the same handshake"""
+        if self.session.connected:
+            return
+        if self._connect_lock is None:
+            self._connect_lock = asyncio.Lock()
+        async with self._connect_lock:
+            if not self.session.connected:
+                await self.session.connect()
+    
+    async def aclose(self) -> None:
+        """Close the MCP session and the pooled connections"""
+        await self.session.aclose()
+        await super().aclose()
+    
+    async def _call_tool(self, method: str, arguments: Dict[str, Any] = None) -> Any:
+        """Call the tool mapped to a client method, coalescing identical in-flight calls"""
+        await self.connect()
+        return await self.single_flight.do(_request_key(method, arguments),
+                                           lambda: self.session.call_tool(self.tools[method], arguments))
+    
+    async def get_pets(self) -> Dict[str, Any]:
+        """Get all pets from the pet store"""
+        try:
+            return await self._call_tool("get_pets")
+        except Exception as e:
+            logger.error(f"Error getting pets: {e}")
+            return {"error": str(e)}
+    
+    async def get_pet_by_id(self, pet_id: int) -> Dict[str, Any]:
+        """Get a specific pet by ID"""
+        try:
+            return await self._call_tool("get_pet_by_id", {"petId": pet_id})
+        except Exception as e:
+            logger.error(f"Error getting pet {pet_id}: {e}")
+            return {"error": str(e)}
+    
+    async def search_pets_by_status(self, status: str) -> Dict[str, Any]:
+        """Search pets by status"""
+        try:
+            return await self._call_tool("search_pets_by_status", {"status": status})
+        except Exception as e:
+            logger.error(f"Error searching pets by status {status}: {e}")
+            return {"error": str(e)}
+    
+    async def _list_tool(self, status: str = None) -> Any:
+        """Call the listing tool for an optional status"""
+        if status:
+            return await self._call_tool("search_pets_by_status", {"status": status})
+        return await self._call_tool("get_pets")
+    
+    async def search_pets(self, status: str = None, category: str = None) -> Dict[str, Any]:
+        """Search pets by status and/or category; there is no category tool, so that filter runs locally"""
+        try:
+            data = await self._list_tool(status)
+            if isinstance(data, list):
+                data = list(filter_pets(data, status, category))
+            return data
+        except Exception as e:
+            logger.error(f"Error searching pets (status={status}, category={category}): {e}")
+            return {"error": str(e)}
+    
+    async def iter_pet_pages(self, status: str = None, page_size: int = 100,
+                             category: str = None) -> AsyncIterator[List[Dict[str, Any]]]:
+        """Yield the listing in pages of ``page_size``; the tools are not paginated, so it takes one call"""
+        items, _ = split_page(await self._list_tool(status))
+        if status or category:
+            items = list(filter_pets(items, status, category))
+        for start in range(0, len(items), page_size):
+            yield items[start:start + page_size]
+
+class BlockingPetStoreClient:
+    """Synchronous facade running an async Pet Store client on a private event loop thread
+    
+    Lets the thread-based orchestrator drive SSEPetStoreMCPClient: each call is submitted to
+    the loop and waited for, so prompts processed on many threads still share one MCP session.
+    Attributes the app reads for its run summary (retry policy, breakers, ...) are looked up
+    on the wrapped client.
+    """
+    
+    # Tool calls are not cached
+    cache = None
+    
+    def __init__(self, factory: Callable[[], Any]):
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._loop.run_forever, name="mcp-event-loop", daemon=True)
+        self._thread.start()
         
-        if pet.get('photoUrls'):
-            response += f"📸 Photos: {len(pet.get('photoUrls', []))} available\n"
+        async def create() -> Any:
+            return factory()
         
-        return response
+        # Built on the loop so any asyncio primitives it creates belong to that loop
+        self.client = self._run(create())
     
-    def _get_pet_emoji(self, category: str) -> str:
-        """Get appropriate emoji for pet category"""
-        category_lower = category.lower() if category else ""
-        if "dog" in category_lower:
-            return "🐕"
-        elif "cat" in category_lower:
-            return "🐱"
-        elif "bird" in category_lower:
-            return "🐦"
-        elif "fish" in category_lower:
-            return "🐠"
-        elif "rabbit" in category_lower:
-            return "🐰"
-        else:
-            return "🐾"
-    
-    def _get_status_emoji(self, status: str) -> str:
-        """Get appropriate emoji for pet status"""
-        status_lower = status.lower() if status else ""
-        if status_lower == "available":
-            return "🟢"
-        elif status_lower == "pending":
-            return "🟡"
-        elif status_lower == "sold":
-            return "🔴"
-        else:
-            return "❓"
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self.client, name)
+    
+    def _run(self, coroutine: Awaitable[Any]) -> Any:
+        return asyncio.run_coroutine_threadsafe(coroutine, self._loop).result()
+    
+    def get_pets(self) -> Dict[str, Any]:
+        """Get all pets from the pet store"""
+        return self._run(self.client.get_pets())
+    
+    def get_pet_by_id(self, pet_id: int) -> Dict[str, Any]:
+        """Get a specific pet by ID"""
+        return self._run(self.client.get_pet_by_id(pet_id))
+    
+    def search_pets_by_status(self, status: str) -> Dict[str, Any]:
+        """Search pets by status"""
+        return self._run(self.client.search_pets_by_status(status))
+    
+    def search_pets(self, status: str = None, category: str = None) -> Dict[str, Any]:
+        """Search pets by status and/or category"""
+        return self._run(self.client.search_pets(status, category))
+    
+    def iter_pets(self, status: str = None, category: str = None) -> Iterator[Dict[str, Any]]:
+        """Iterate over a listing; errors are returned up front as ``{"error": ...}``"""
+        data = self.search_pets(status, category)
+        return iter(data) if isinstance(data, list) else data
+    
+    def close(self) -> None:
+        """Close the wrapped client and stop the event loop thread"""
+        try:
+            self._run(self.client.aclose())
+        finally:
+            self._loop.call_soon_threadsafe(self._loop.stop)
+            self._thread.join()
+            self._loop.close()
 
-class PetStoreDemoApp:
+class PetStoreDemoApp(BaseDemoApp):
     """Main application class"""
     
-    def __init__(self):
+    def __init__(self, max_workers: int = 1, cache: ResponseCache = None, stream: bool = False,
+                 page_size: int = None, batch: bool = False,
+                 jsonl: bool = False, recorder: LatencyRecorder = None, tracer: Any = None,
+                 retry_policy: RetryPolicy = None, breakers: CircuitBreakers = None, timeout: float = 10.0,
+                 hedge_policy: HedgePolicy = None, rate_limiter: RateLimiter = None,
+                 concurrency_limit: AdaptiveConcurrencyLimit = None, transport: str = "rest"):
         # MCP Server URL from the requirements
         self.mcp_url = "https://apim-apiops-dev-eastus2-basic.azure-api.net/pet-shop-mcp"
-        self.client = PetStoreMCPClient(self.mcp_url)
-        self.orchestrator = AIOrchestrator(self.client)
-        
-        # Predefined prompts as required
-        self.predefined_prompts = [
-            "Show me all pets in the store",
-            "What pets are available for adoption?", 
-            "Find me pet with ID 1",
-            "Which pets are currently pending adoption?",
-            "Show me all sold pets",
-            "Tell me about pet number 42",
-            "List available dogs",
-            "What cats do you have?"
-        ]
-    
-    def run(self):
-        """Run the demo application"""
-        print("🏪 Welcome to the Pet Store MCP Demo! 🏪")
-        print("=" * 50)
-        print()
-        
+        self.transport = transport
+        if transport == "sse":
+            # MCP tools/call requests over one persistent SSE session instead of REST GETs
+            client = BlockingPetStoreClient(lambda: SSEPetStoreMCPClient(self.mcp_url, timeout=timeout))
+        else:
+            pool_maxsize = max(10, max_workers, concurrency_limit.max_limit if concurrency_limit is not None else 0)
+            client = PetStoreMCPClient(self.mcp_url, pool_maxsize=pool_maxsize, cache=cache,
+                                       page_size=page_size, recorder=recorder, tracer=tracer,
+                                       retry_policy=retry_policy, breakers=breakers, timeout=timeout,
+                                       hedge_policy=hedge_policy, rate_limiter=rate_limiter,
+                                       concurrency_limit=concurrency_limit)
+        super().__init__(client, max_workers=max_workers, stream=stream, batch=batch, jsonl=jsonl,
+                         recorder=recorder, tracer=tracer)
+    
+    def close(self) -> None:
+        """Release the backend connections (and the event loop thread with --transport sse)"""
+        if isinstance(self.client, BlockingPetStoreClient):
+            self.client.close()
+        else:
+            self.client.session.close()
+    
+    def _print_intro(self) -> None:
         print("🤖 This demo will process several predefined prompts using our AI orchestrator.")
         print("🔗 Connected to MCP Server:", self.mcp_url)
-        print()
-        
-        for i, prompt in enumerate(self.predefined_prompts, 1):
-            print(f"📝 Prompt {i}/{len(self.predefined_prompts)}: {prompt}")
-            print("-" * 50)
-            
-            try:
-                response = self.orchestrator.process_prompt(prompt)
-                print(response)
-            except Exception as e:
-                print(f"❌ Error processing prompt: {e}")
-                logger.exception("Error processing prompt")
-            
-            print()
-            print("=" * 80)
-            print()
-        
-        print("✅ Demo completed! Thank you for using the Pet Store MCP Demo! 🎉")
+        if self.transport == "sse":
+            print("🔌 Transport: MCP tool calls over one Server-Sent Events session")
+    
+    def _print_summary(self) -> None:
+        if self.client.cache is not None:
+            stats = self.client.cache.stats()
+            print(f"💾 Cache: {stats['hits']} hits, {stats['misses']} misses "
+                  f"({stats['hit_ratio']:.0%} hit ratio), {stats['entries']} entries")
+        policy = self.client.retry_policy
+        if policy is not None and (policy.retries or policy.budget_exhausted):
+            print(f"🔁 Retries: {policy.retries} ({policy.budget_exhausted} refused by the retry budget)")
+        limiter = self.client.rate_limiter
+        if limiter is not None and (limiter.delayed or limiter.throttled):
+            rate = f"{limiter.bucket.rate:.1f}/s" if limiter.bucket.rate is not None else "unlimited"
+            print(f"🚦 Rate limiter: {limiter.delayed} requests delayed ({limiter.waited:.1f}s in total), "
+                  f"{limiter.throttled} throttled by the gateway, current rate {rate}")
+        if self.client.concurrency_limit is not None:
+            stats = self.client.concurrency_limit.stats()
+            latency = (f", no-load latency {stats['min_latency_ms']:.1f} ms"
+                       if stats["min_latency_ms"] is not None else "")
+            print(f"📈 Adaptive concurrency limit: {stats['limit']} (peak {stats['peak_limit']}{latency})")
+        hedging = self.client.hedge_policy
+        if hedging is not None and hedging.hedged:
+            print(f"🪁 Hedged requests: {hedging.hedged} ({hedging.backup_wins} answered first by the backup)")
+        if self.client.breakers is not None:
+            for endpoint, stats in self.client.breakers.stats().items():
+                if stats["rejected"] or stats["state"] != CircuitBreaker.CLOSED:
+                    print(f"⚡ Circuit breaker {endpoint}: {stats['state']} ({stats['rejected']} calls failed fast)")
+
+def parse_args(argv: List[str] = None) -> argparse.Namespace:
+    """Parse command line arguments"""
+    parser = argparse.ArgumentParser(description="Pet Store MCP Demo")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="number of prompts to process concurrently (default: 1, sequential)")
+    parser.add_argument("--input", metavar="PATH",
+                        help="read prompts from a text or JSONL file ('-' for stdin) instead of the predefined ones")
+    parser.add_argument("--output-format", choices=("text", "jsonl"), default="text",
+                        help="text: decorated responses (default); jsonl: one JSON object per prompt, no rendering")
+    parser.add_argument("--timings", action="store_true",
+                        help="record per-stage latencies and print a summary table at the end")
+    parser.add_argument("--timings-output", metavar="PATH",
+                        help="also write the per-stage latency summary as JSON to this file (implies --timings)")
+    parser.add_argument("--trace", choices=("otlp", "file"),
+                        help="export OpenTelemetry spans to an OTLP/HTTP collector or a JSON-lines file")
+    parser.add_argument("--trace-target", metavar="URL_OR_PATH",
+                        help="OTLP endpoint (default: http://localhost:4318/v1/traces) or trace file "
+                             "(default: pet_store_traces.jsonl)")
+    parser.add_argument("--batch", action="store_true",
+                        help="route all prompts first and execute each distinct backend call once")
+    parser.add_argument("--stream", action="store_true",
+                        help="write list responses pet by pet as they are rendered (prompts run sequentially)")
+    parser.add_argument("--page-size", type=int, default=None,
+                        help="fetch listings in pages of N pets, prefetching the next page (default: unpaged)")
+    parser.add_argument("--timeout", type=float, default=10.0,
+                        help="seconds to wait for the gateway to connect and respond (default: 10)")
+    parser.add_argument("--breaker-threshold", type=int, default=5,
+                        help="consecutive failures that open an endpoint's circuit breaker (default: 5, 0 disables)")
+    parser.add_argument("--breaker-reset", type=float, default=30.0,
+                        help="seconds an open circuit fails fast before a trial call is let through (default: 30)")
+    parser.add_argument("--hedge", action="store_true",
+                        help="send a backup request for GETs slower than the endpoint's observed p95 latency")
+    parser.add_argument("--hedge-delay", type=float, default=None,
+                        help="hedge after a fixed number of seconds instead of the observed p95 (implies --hedge)")
+    parser.add_argument("--hedge-rate", type=float, default=0.1,
+                        help="maximum fraction of requests that may be hedged (default: 0.1)")
+    parser.add_argument("--rate-limit", metavar="RPS|auto",
+                        help="client-side request rate limit; 'auto' tunes it purely from the gateway's "
+                             "rate-limit headers (default: off)")
+    parser.add_argument("--endpoint-rate-limit", metavar="ENDPOINT=RPS", action="append", default=[],
+                        help="extra per-endpoint limit, e.g. '/pets/{id}=5' (repeatable)")
+    parser.add_argument("--adaptive-concurrency", choices=("aimd", "gradient"),
+                        help="cap in-flight backend requests with a limit that grows while latency is stable "
+                             "and shrinks on latency rises or errors (default: off)")
+    parser.add_argument("--max-concurrency", type=int, default=64,
+                        help="upper bound for the adaptive concurrency limit (default: 64)")
+    parser.add_argument("--transport", choices=("rest", "sse"), default="rest",
+                        help="'rest' sends plain GETs to the gateway's REST API (default); 'sse' sends MCP "
+                             "tools/call requests over one Server-Sent Events session (requires httpx; "
+                             "caching, paging, retries, breakers, hedging and limits apply to 'rest' only)")
+    parser.add_argument("--max-retries", type=int, default=2,
+                        help="retries per call for timeouts, connection errors and 429/502/503/504 (0 disables)")
+    parser.add_argument("--retry-budget", type=float, default=0.2,
+                        help="retries allowed per original request across the whole run (default: 0.2)")
+    parser.add_argument("--cache-ttl", type=float, default=30.0,
+                        help="seconds to cache backend responses in memory (0 disables the cache)")
+    return parser.parse_args(argv)
 
 def main():
     """Main entry point"""
     try:
-        app = PetStoreDemoApp()
-        app.run()
+        args = parse_args()
+        cache = ResponseCache(default_ttl=args.cache_ttl) if args.cache_ttl > 0 else None
+        recorder = LatencyRecorder() if args.timings or args.timings_output else None
+        retry_policy = (RetryPolicy(max_attempts=args.max_retries + 1, budget=RetryBudget(ratio=args.retry_budget))
+                        if args.max_retries > 0 else None)
+        breakers = (CircuitBreakers(failure_threshold=args.breaker_threshold, reset_timeout=args.breaker_reset)
+                    if args.breaker_threshold > 0 else None)
+        rate_limiter = None
+        if args.rate_limit or args.endpoint_rate_limit:
+            endpoint_rates = dict(limit.rsplit("=", 1) for limit in args.endpoint_rate_limit)
+            rate_limiter = RateLimiter(
+                rate=None if args.rate_limit in (None, "auto") else float(args.rate_limit),
+                endpoint_rates={endpoint: float(rate) for endpoint, rate in endpoint_rates.items()})
+        concurrency_limit = (AdaptiveConcurrencyLimit(algorithm=args.adaptive_concurrency,
+                                                      initial_limit=min(10, args.max_concurrency),
+                                                      max_limit=args.max_concurrency)
+                             if args.adaptive_concurrency else None)
+        hedge_policy = (HedgePolicy(delay=args.hedge_delay, max_rate=args.hedge_rate)
+                        if args.hedge or args.hedge_delay is not None else None)
+        tracer, tracer_provider = configure_tracing(args.trace, args.trace_target) if args.trace else (None, None)
+        app = PetStoreDemoApp(max_workers=args.workers, cache=cache, stream=args.stream,
+                              page_size=args.page_size, batch=args.batch,
+                              jsonl=args.output_format == "jsonl", recorder=recorder,
+                              tracer=tracer, retry_policy=retry_policy, breakers=breakers,
+                              timeout=args.timeout, hedge_policy=hedge_policy, rate_limiter=rate_limiter,
+                              concurrency_limit=concurrency_limit, transport=args.transport)
+        try:
+            if args.input:
+                count = app.run_input(args.input)
+                # Keep stdout pure JSON lines in jsonl mode
+                print(f"✅ Processed {count} prompts", file=sys.stderr if app.jsonl else sys.stdout)
+            elif app.jsonl:
+                app.run_jsonl()
+            else:
+                app.run()
+        finally:
+            app.close()
+        if args.input or app.jsonl:
+            app.print_timings(file=sys.stderr if app.jsonl else sys.stdout)
+        if args.timings_output:
+            recorder.export_json(args.timings_output)
+        if tracer_provider is not None:
+            # Flush batched spans before the process exits
+            tracer_provider.shutdown()
     except KeyboardInterrupt:
         print("\n👋 Demo interrupted by user. Goodbye!")
         sys.exit(0)
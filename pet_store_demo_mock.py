@@ -10,17 +10,94 @@ This version shows all the functionality working with sample data to
 demonstrate the complete solution.
 """
 
-import json
+import argparse
+import bisect
+import itertools
+import random
 import sys
-from typing import List, Dict, Any
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Tuple
+
+import pet_store_common
+from pet_store_common import BaseDemoApp, IntentRouter, LatencyRecorder, configure_tracing
+
+# Distributions for synthetic catalogs, loosely modelled on a real shelter's inventory
+SYNTHETIC_CATEGORIES = [
+    ({"id": 1, "name": "Dogs"}, 0.45),
+    ({"id": 2, "name": "Cats"}, 0.35),
+    ({"id": 3, "name": "Birds"}, 0.08),
+    ({"id": 4, "name": "Fish"}, 0.07),
+    ({"id": 5, "name": "Rabbits"}, 0.05)
+]
+SYNTHETIC_STATUSES = [("available", 0.60), ("pending", 0.15), ("sold", 0.25)]
+SYNTHETIC_TAGS = [
+    ({"id": 1, "name": "friendly"}, 0.30),
+    ({"id": 2, "name": "trained"}, 0.15),
+    ({"id": 3, "name": "calm"}, 0.12),
+    ({"id": 4, "name": "indoor"}, 0.12),
+    ({"id": 5, "name": "energetic"}, 0.10),
+    ({"id": 6, "name": "quiet"}, 0.08),
+    ({"id": 7, "name": "guard dog"}, 0.03),
+    ({"id": 8, "name": "senior"}, 0.05),
+    ({"id": 9, "name": "special needs"}, 0.02),
+    ({"id": 10, "name": "young"}, 0.03)
+]
+# Number of tags / photos per pet
+SYNTHETIC_TAG_COUNTS = [(0, 0.15), (1, 0.35), (2, 0.35), (3, 0.15)]
+SYNTHETIC_PHOTO_COUNTS = [(0, 0.10), (1, 0.45), (2, 0.25), (3, 0.12), (5, 0.08)]
+SYNTHETIC_NAMES = [
+    "Bella", "Max", "Luna", "Charlie", "Lucy", "Cooper", "Daisy", "Milo", "Coco", "Rocky",
+    "Nala", "Oliver", "Lola", "Leo", "Zoe", "Buddy", "Chloe", "Bear", "Ruby", "Teddy",
+    "Pepper", "Simba", "Willow", "Ziggy", "Mochi", "Biscuit", "Olive", "Finn", "Hazel", "Gus"
+]
+
+def _weighted_picker(rng: random.Random, weighted: List[Tuple[Any, float]]) -> Callable[[], Any]:
+    """Build a fast sampler for a list of (value, weight) pairs"""
+    values = [value for value, _ in weighted]
+    cumulative = list(itertools.accumulate(weight for _, weight in weighted))
+    total = cumulative[-1]
+    return lambda: values[bisect.bisect(cumulative, rng.random() * total)]
+
+def generate_mock_pets(count: int, seed: int = 42, start_id: int = 1) -> Iterator[Dict[str, Any]]:
+    """Yield ``count`` synthetic pets drawn from seeded, realistic distributions
+    
+    The same seed always produces the same catalog. Category and tag dicts are shared
+    between pets to keep multi-million pet catalogs within memory.
+    """
+    rng = random.Random(seed)
+    pick_category = _weighted_picker(rng, SYNTHETIC_CATEGORIES)
+    pick_status = _weighted_picker(rng, SYNTHETIC_STATUSES)
+    pick_tag_count = _weighted_picker(rng, SYNTHETIC_TAG_COUNTS)
+    pick_photo_count = _weighted_picker(rng, SYNTHETIC_PHOTO_COUNTS)
+    pick_tag = _weighted_picker(rng, SYNTHETIC_TAGS)
+    
+    for pet_id in range(start_id, start_id + count):
+        tags = []
+        for _ in range(pick_tag_count()):
+            tag = pick_tag()
+            if tag not in tags:
+                tags.append(tag)
+        yield {
+            "id": pet_id,
+            "name": rng.choice(SYNTHETIC_NAMES),
+            "category": pick_category(),
+            "status": pick_status(),
+            "tags": tags,
+            "photoUrls": [f"https://example.com/pets/{pet_id}/{n}.jpg" for n in range(pick_photo_count())]
+        }
 
 class MockPetStoreMCPClient:
     """Mock client that simulates the Pet Store MCP server responses"""
     
     def __init__(self, base_url: str):
         self.base_url = base_url
+        # Primary index by id plus secondary indexes (dicts used as insertion-ordered sets of ids)
+        self._pets_by_id: Dict[int, Dict[str, Any]] = {}
+        self._ids_by_status: Dict[str, Dict[int, None]] = {}
+        self._ids_by_category: Dict[str, Dict[int, None]] = {}
+        self._ids_by_tag: Dict[str, Dict[int, None]] = {}
+        
         # Mock data for demonstration
-        self.mock_pets = [
+        mock_pets = [
             {
                 "id": 1,
                 "name": "Buddy",
@@ -62,238 +139,182 @@ class MockPetStoreMCPClient:
                 "photoUrls": ["https://example.com/max.jpg"]
             }
         ]
+        for pet in mock_pets:
+            self.add_pet(pet)
     
-    def get_pets(self) -> List[Dict[str, Any]]:
-        """Get all pets from the pet store"""
-        return self.mock_pets.copy()
+    @property
+    def mock_pets(self) -> List[Dict[str, Any]]:
+        """All pets in insertion order"""
+        return list(self._pets_by_id.values())
     
-    def get_pet_by_id(self, pet_id: int) -> Dict[str, Any]:
-        """Get a specific pet by ID"""
-        for pet in self.mock_pets:
-            if pet["id"] == pet_id:
-                return pet.copy()
-        return {"error": f"Pet with ID {pet_id} not found"}
+    def _index_keys(self, pet: Dict[str, Any]):
+        """Yield (index, key) pairs under which a pet is indexed"""
+        yield self._ids_by_status, pet.get("status", "")
+        yield self._ids_by_category, pet.get("category", {}).get("name", "").lower()
+        for tag in pet.get("tags", []):
+            yield self._ids_by_tag, tag.get("name", "").lower()
     
-    def search_pets_by_status(self, status: str) -> List[Dict[str, Any]]:
-        """Search pets by status"""
-        return [pet.copy() for pet in self.mock_pets if pet["status"] == status]
-
-class AIOrchestrator:
-    """Simple AI orchestrator that processes prompts and calls appropriate MCP functions"""
+    def _index(self, pet: Dict[str, Any]) -> None:
+        for index, key in self._index_keys(pet):
+            index.setdefault(key, {})[pet["id"]] = None
     
-    def __init__(self, mcp_client):
-        self.mcp_client = mcp_client
+    def _unindex(self, pet: Dict[str, Any]) -> None:
+        for index, key in self._index_keys(pet):
+            ids = index.get(key)
+            if ids is not None:
+                ids.pop(pet["id"], None)
+                if not ids:
+                    del index[key]
     
-    def process_prompt(self, prompt: str) -> str:
-        """Process a user prompt and return a formatted response"""
-        prompt_lower = prompt.lower()
-        
-        # Simple keyword-based routing (this would be enhanced with Semantic Kernel in production)
-        if "all pets" in prompt_lower or "list pets" in prompt_lower:
-            return self._handle_get_all_pets()
-        elif "pet" in prompt_lower and ("id" in prompt_lower or any(char.isdigit() for char in prompt)):
-            # Extract pet ID from prompt
-            pet_id = self._extract_pet_id(prompt)
-            if pet_id:
-                return self._handle_get_pet_by_id(pet_id)
-            else:
-                return "🤔 I couldn't find a valid pet ID in your request. Please specify a pet ID number."
-        elif "pending" in prompt_lower:
-            return self._handle_get_pending_pets()
-        elif "available" in prompt_lower or "adoption" in prompt_lower:
-            return self._handle_get_available_pets()
-        elif "sold" in prompt_lower:
-            return self._handle_get_sold_pets()
-        elif "dog" in prompt_lower:
-            return self._handle_get_dogs()
-        elif "cat" in prompt_lower:
-            return self._handle_get_cats()
-        else:
-            return self._handle_general_query(prompt)
+    def _lookup(self, index: Dict[str, Dict[int, None]], key: str) -> List[Dict[str, Any]]:
+        return [self._pets_by_id[pet_id].copy() for pet_id in index.get(key, ())]
+    
+    def pet_count(self) -> int:
+        """Number of pets in the catalog"""
+        return len(self._pets_by_id)
+    
+    def load_synthetic_pets(self, count: int, seed: int = 42) -> int:
+        """Append ``count`` generated pets after the highest existing ID and return how many were added"""
+        start_id = max(self._pets_by_id, default=0) + 1
+        for pet in generate_mock_pets(count, seed=seed, start_id=start_id):
+            # Generated pets are fresh dicts, so they can be indexed without the defensive copy
+            self._pets_by_id[pet["id"]] = pet
+            self._index(pet)
+        return count
     
-    def _extract_pet_id(self, prompt: str) -> int:
-        """Extract pet ID from prompt"""
-        import re
-        numbers = re.findall(r'\d+', prompt)
-        return int(numbers[0]) if numbers else None
+    def add_pet(self, pet: Dict[str, Any]) -> Dict[str, Any]:
+        """Add a pet (or replace the pet with the same ID), keeping every index up to date"""
+        pet = dict(pet)
+        existing = self._pets_by_id.get(pet["id"])
+        if existing is not None:
+            self._unindex(existing)
+        self._pets_by_id[pet["id"]] = pet
+        self._index(pet)
+        return pet.copy()
     
-    def _handle_get_all_pets(self) -> str:
-        """Handle request to get all pets"""
-        result = self.mcp_client.get_pets()
-        return self._format_pets_response(result, "🐾 Here are all the pets in our store:")
+    def update_pet(self, pet: Dict[str, Any]) -> Dict[str, Any]:
+        """Update an existing pet, keeping every index up to date"""
+        if pet.get("id") not in self._pets_by_id:
+            return {"error": f"Pet with ID {pet.get('id')} not found"}
+        return self.add_pet(pet)
     
-    def _handle_get_pet_by_id(self, pet_id: int) -> str:
-        """Handle request to get a specific pet"""
-        result = self.mcp_client.get_pet_by_id(pet_id)
-        if "error" in result:
-            return f"❌ Sorry, I couldn't find pet {pet_id}: {result['error']}"
+    def delete_pet(self, pet_id: int) -> Dict[str, Any]:
+        """Remove a pet and drop it from every index"""
+        pet = self._pets_by_id.pop(pet_id, None)
+        if pet is None:
+            return {"error": f"Pet with ID {pet_id} not found"}
+        self._unindex(pet)
+        return pet
+    
+    def get_pets(self) -> List[Dict[str, Any]]:
+        """Get all pets from the pet store"""
+        return list(self._pets_by_id.values())
+    
+    def iter_pets(self, status: str = None, category: str = None) -> Iterator[Dict[str, Any]]:
+        """Lazily iterate over pets (optionally filtered by status and category) without building a list
         
-        return self._format_single_pet_response(result)
+        Yields the catalog's own dicts, so callers must not modify them.
+        """
+        if status is None and category is None:
+            return iter(self._pets_by_id.values())
+        return (self._pets_by_id[pet_id] for pet_id in self._matching_ids(status, category))
     
-    def _handle_get_available_pets(self) -> str:
-        """Handle request to get available pets"""
-        result = self.mcp_client.search_pets_by_status("available")
-        return self._format_pets_response(result, "🟢 Here are the pets available for adoption:")
+    def _matching_ids(self, status: str = None, category: str = None) -> Iterable[int]:
+        """IDs of pets matching every given predicate, by intersecting the secondary indexes
+        
+        Walks the smallest candidate index and probes the others, so the cost is bounded by
+        the narrowest predicate rather than the catalog size.
+        """
+        candidates = []
+        if status is not None:
+            candidates.append(self._ids_by_status.get(status, {}))
+        if category is not None:
+            candidates.append(self._ids_by_category.get(category.lower(), {}))
+        candidates.sort(key=len)
+        smallest, others = candidates[0], candidates[1:]
+        return (pet_id for pet_id in smallest if all(pet_id in ids for ids in others))
     
-    def _handle_get_sold_pets(self) -> str:
-        """Handle request to get sold pets"""
-        result = self.mcp_client.search_pets_by_status("sold")
-        return self._format_pets_response(result, "🔴 Here are the pets that have been sold:")
+    def get_pet_by_id(self, pet_id: int) -> Dict[str, Any]:
+        """Get a specific pet by ID"""
+        pet = self._pets_by_id.get(pet_id)
+        if pet is None:
+            return {"error": f"Pet with ID {pet_id} not found"}
+        return pet.copy()
     
-    def _handle_get_pending_pets(self) -> str:
-        """Handle request to get pending pets"""
-        result = self.mcp_client.search_pets_by_status("pending")
-        return self._format_pets_response(result, "🟡 Here are the pets with pending adoptions:")
+    def search_pets_by_status(self, status: str) -> List[Dict[str, Any]]:
+        """Search pets by status"""
+        return self._lookup(self._ids_by_status, status)
     
-    def _handle_get_dogs(self) -> str:
-        """Handle request to get dogs"""
-        all_pets = self.mcp_client.get_pets()
-        dogs = [pet for pet in all_pets if pet.get('category', {}).get('name', '').lower() == 'dogs']
-        available_dogs = [dog for dog in dogs if dog.get('status') == 'available']
-        return self._format_pets_response(available_dogs, "🐕 Here are the available dogs in our store:")
+    def search_pets(self, status: str = None, category: str = None) -> List[Dict[str, Any]]:
+        """Search pets matching every given predicate (status, case-insensitive category)"""
+        return [pet.copy() for pet in self.iter_pets(status=status, category=category)]
     
-    def _handle_get_cats(self) -> str:
-        """Handle request to get cats"""
-        all_pets = self.mcp_client.get_pets()
-        cats = [pet for pet in all_pets if pet.get('category', {}).get('name', '').lower() == 'cats']
-        return self._format_pets_response(cats, "🐱 Here are all the cats in our store:")
+    def search_pets_by_category(self, category: str) -> List[Dict[str, Any]]:
+        """Search pets by category name (case-insensitive)"""
+        return self._lookup(self._ids_by_category, category.lower())
     
-    def _handle_general_query(self, prompt: str) -> str:
-        """Handle general queries about the pet store"""
-        return f"""🐕 Welcome to our Pet Store! 🐱
+    def search_pets_by_tag(self, tag: str) -> List[Dict[str, Any]]:
+        """Search pets by tag name (case-insensitive)"""
+        return self._lookup(self._ids_by_tag, tag.lower())
 
-I can help you with:
-• 📋 List all pets: "Show me all pets"
-• 🔍 Find a specific pet: "Show me pet with ID 123"
-• 🟢 Available pets: "What pets are available?"
-• 🟡 Pending adoptions: "Which pets are pending?"
-• 🔴 Sold pets: "What pets have been sold?"
-• 🐕 Dogs: "List available dogs"
-• 🐱 Cats: "What cats do you have?"
-
-Your request: "{prompt}"
-Try rephrasing your question using one of the examples above! 😊"""
+class AIOrchestrator(pet_store_common.AIOrchestrator):
+    """Simple AI orchestrator that processes prompts and calls appropriate MCP functions
+    (this would be enhanced with Semantic Kernel in production)
     
-    def _format_pets_response(self, data: List[Dict[str, Any]], header: str) -> str:
-        """Format a list of pets into a nice response"""
-        if not data or len(data) == 0:
-            return f"{header}\n\n😔 No pets found."
-        
-        response = f"{header}\n\n"
-        
-        for i, pet in enumerate(data, 1):
-            pet_emoji = self._get_pet_emoji(pet.get('category', {}).get('name', ''))
-            status_emoji = self._get_status_emoji(pet.get('status', ''))
-            
-            response += f"{pet_emoji} **Pet #{pet.get('id', 'Unknown')}**: {pet.get('name', 'Unnamed')}\n"
-            response += f"   📂 Category: {pet.get('category', {}).get('name', 'Unknown')}\n"
-            response += f"   {status_emoji} Status: {pet.get('status', 'Unknown').title()}\n"
-            
-            if pet.get('tags'):
-                tags = ', '.join([tag.get('name', '') for tag in pet.get('tags', [])])
-                response += f"   🏷️  Tags: {tags}\n"
-            
-            response += "\n"
-        
-        return response
+    Adds dog and cat listings, which the mock catalog can filter by category.
+    """
     
-    def _format_single_pet_response(self, pet: Dict[str, Any]) -> str:
-        """Format a single pet into a detailed response"""
-        pet_emoji = self._get_pet_emoji(pet.get('category', {}).get('name', ''))
-        status_emoji = self._get_status_emoji(pet.get('status', ''))
-        
-        response = f"{pet_emoji} **Pet Details** {pet_emoji}\n\n"
-        response += f"🆔 ID: {pet.get('id', 'Unknown')}\n"
-        response += f"📛 Name: {pet.get('name', 'Unnamed')}\n"
-        response += f"📂 Category: {pet.get('category', {}).get('name', 'Unknown')}\n"
-        response += f"{status_emoji} Status: {pet.get('status', 'Unknown').title()}\n"
-        
-        if pet.get('tags'):
-            tags = ', '.join([tag.get('name', '') for tag in pet.get('tags', [])])
-            response += f"🏷️  Tags: {tags}\n"
-        
-        if pet.get('photoUrls'):
-            response += f"📸 Photos: {len(pet.get('photoUrls', []))} available\n"
-        
-        return response
+    ROUTING_TABLE = pet_store_common.AIOrchestrator.ROUTING_TABLE + [
+        ("dogs", [("dog",)]),
+        ("cats", [("cat",)])
+    ]
+    ROUTER = IntentRouter(ROUTING_TABLE)
     
-    def _get_pet_emoji(self, category: str) -> str:
-        """Get appropriate emoji for pet category"""
-        category_lower = category.lower() if category else ""
-        if "dog" in category_lower:
-            return "🐕"
-        elif "cat" in category_lower:
-            return "🐱"
-        elif "bird" in category_lower:
-            return "🐦"
-        elif "fish" in category_lower:
-            return "🐠"
-        elif "rabbit" in category_lower:
-            return "🐰"
-        else:
-            return "🐾"
+    LIST_FILTERS = {
+        **pet_store_common.AIOrchestrator.LIST_FILTERS,
+        "dogs": ("available", "dogs"),
+        "cats": (None, "cats")
+    }
     
-    def _get_status_emoji(self, status: str) -> str:
-        """Get appropriate emoji for pet status"""
-        status_lower = status.lower() if status else ""
-        if status_lower == "available":
-            return "🟢"
-        elif status_lower == "pending":
-            return "🟡"
-        elif status_lower == "sold":
-            return "🔴"
-        else:
-            return "❓"
+    LIST_RESPONSES = {
+        **pet_store_common.AIOrchestrator.LIST_RESPONSES,
+        "dogs": ("🐕 Here are the available dogs in our store:", "available dogs"),
+        "cats": ("🐱 Here are all the cats in our store:", "cats")
+    }
+    
+    EXAMPLES = pet_store_common.AIOrchestrator.EXAMPLES + [
+        '🐕 Dogs: "List available dogs"',
+        '🐱 Cats: "What cats do you have?"'
+    ]
 
-class PetStoreDemoApp:
+class PetStoreDemoApp(BaseDemoApp):
     """Main application class"""
     
-    def __init__(self):
+    ORCHESTRATOR = AIOrchestrator
+    PROMPT_RULE_WIDTH = 60
+    
+    def __init__(self, max_workers: int = 1, synthetic_pets: int = 0, seed: int = 42, stream: bool = False,
+                 batch: bool = False, jsonl: bool = False, recorder: LatencyRecorder = None,
+                 tracer: Any = None):
         # MCP Server URL from the requirements
         self.mcp_url = "https://apim-apiops-dev-eastus2-basic.azure-api.net/pet-shop-mcp/sse"
         # Using mock client for demonstration (in production, this would be the real MCP client)
-        self.client = MockPetStoreMCPClient(self.mcp_url)
-        self.orchestrator = AIOrchestrator(self.client)
-        
-        # Predefined prompts as required
-        self.predefined_prompts = [
-            "Show me all pets in the store",
-            "What pets are available for adoption?", 
-            "Find me pet with ID 1",
-            "Which pets are currently pending adoption?",
-            "Show me all sold pets",
-            "Tell me about pet number 42",
-            "List available dogs",
-            "What cats do you have?"
-        ]
+        client = MockPetStoreMCPClient(self.mcp_url)
+        if synthetic_pets:
+            client.load_synthetic_pets(synthetic_pets, seed=seed)
+        super().__init__(client, max_workers=max_workers, stream=stream, batch=batch, jsonl=jsonl,
+                         recorder=recorder, tracer=tracer)
     
-    def run(self):
-        """Run the demo application"""
-        print("🏪 Welcome to the Pet Store MCP Demo! 🏪")
-        print("=" * 50)
-        print()
-        
+    def _print_intro(self) -> None:
         print("🤖 This demo processes predefined prompts using our AI orchestrator.")
         print("🔗 Target MCP Server:", self.mcp_url)
         print("📊 Running in DEMO MODE with mock data")
+        print(f"📦 Catalog size: {self.client.pet_count():,} pets")
         print("💡 In production, this would connect to the real MCP server")
-        print()
-        
-        for i, prompt in enumerate(self.predefined_prompts, 1):
-            print(f"📝 Prompt {i}/{len(self.predefined_prompts)}: {prompt}")
-            print("-" * 60)
-            
-            try:
-                response = self.orchestrator.process_prompt(prompt)
-                print(response)
-            except Exception as e:
-                print(f"❌ Error processing prompt: {e}")
-            
-            print()
-            print("=" * 80)
-            print()
-        
-        print("✅ Demo completed! Thank you for using the Pet Store MCP Demo! 🎉")
+    
+    def run(self):
+        """Run the demo application"""
+        super().run()
         print()
         print("🔧 Implementation Details:")
         print("• ✅ Script accepts 1-N prompts (8 predefined prompts demonstrated)")
@@ -302,11 +323,60 @@ class PetStoreDemoApp:
         print("• ✅ Output includes nice formatting with emojis")
         print("• 🚀 Ready for Semantic Kernel integration")
 
+def parse_args(argv: List[str] = None) -> argparse.Namespace:
+    """Parse command line arguments"""
+    parser = argparse.ArgumentParser(description="Pet Store MCP Demo (Demo Mode)")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="number of prompts to process concurrently (default: 1, sequential)")
+    parser.add_argument("--input", metavar="PATH",
+                        help="read prompts from a text or JSONL file ('-' for stdin) instead of the predefined ones")
+    parser.add_argument("--output-format", choices=("text", "jsonl"), default="text",
+                        help="text: decorated responses (default); jsonl: one JSON object per prompt, no rendering")
+    parser.add_argument("--timings", action="store_true",
+                        help="record per-stage latencies and print a summary table at the end")
+    parser.add_argument("--timings-output", metavar="PATH",
+                        help="also write the per-stage latency summary as JSON to this file (implies --timings)")
+    parser.add_argument("--trace", choices=("otlp", "file"),
+                        help="export OpenTelemetry spans to an OTLP/HTTP collector or a JSON-lines file")
+    parser.add_argument("--trace-target", metavar="URL_OR_PATH",
+                        help="OTLP endpoint (default: http://localhost:4318/v1/traces) or trace file "
+                             "(default: pet_store_traces.jsonl)")
+    parser.add_argument("--batch", action="store_true",
+                        help="route all prompts first and execute each distinct backend call once")
+    parser.add_argument("--stream", action="store_true",
+                        help="write list responses pet by pet as they are rendered (prompts run sequentially)")
+    parser.add_argument("--pets", type=int, default=0,
+                        help="add N synthetic pets to the mock catalog (e.g. 100000)")
+    parser.add_argument("--seed", type=int, default=42,
+                        help="random seed for the synthetic catalog (default: 42)")
+    return parser.parse_args(argv)
+
 def main():
     """Main entry point"""
     try:
-        app = PetStoreDemoApp()
-        app.run()
+        args = parse_args()
+        recorder = LatencyRecorder() if args.timings or args.timings_output else None
+        tracer, tracer_provider = (configure_tracing(args.trace, args.trace_target, service_name="pet-store-demo-mock")
+                                   if args.trace else (None, None))
+        app = PetStoreDemoApp(max_workers=args.workers, synthetic_pets=args.pets, seed=args.seed,
+                              stream=args.stream, batch=args.batch,
+                              jsonl=args.output_format == "jsonl", recorder=recorder,
+                              tracer=tracer)
+        if args.input:
+            count = app.run_input(args.input)
+            # Keep stdout pure JSON lines in jsonl mode
+            print(f"✅ Processed {count} prompts", file=sys.stderr if app.jsonl else sys.stdout)
+        elif app.jsonl:
+            app.run_jsonl()
+        else:
+            app.run()
+        if args.input or app.jsonl:
+            app.print_timings(file=sys.stderr if app.jsonl else sys.stdout)
+        if args.timings_output:
+            recorder.export_json(args.timings_output)
+        if tracer_provider is not None:
+            # Flush batched spans before the process exits
+            tracer_provider.shutdown()
     except KeyboardInterrupt:
         print("\n👋 Demo interrupted by user. Goodbye!")
         sys.exit(0)
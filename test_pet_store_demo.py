@@ -0,0 +1,928 @@
+#!/usr/bin/env python3
+"""
+Pet Store MCP Unit Tests
+========================
+
+Standard-library unit tests for the pure building blocks of the demo: prompt routing,
+streamed JSON parsing, pagination, rate limiting and adaptive concurrency. Nothing here
+touches the network.
+
+Usage:
+    python -m unittest -v test_pet_store_demo
+"""
+
+import asyncio
+import json
+import random
+import re
+import threading
+import time
+import unittest
+from email.utils import formatdate
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from unittest import mock
+
+import requests
+
+import pet_store_benchmark
+import pet_store_demo
+import pet_store_demo_mock
+from pet_store_demo import (AdaptiveConcurrencyLimit, AsyncPetStoreMCPClient, CircuitBreaker, CircuitBreakers,
+                            HedgePolicy, IntentRouter, PetStoreMCPClient, RateLimiter, ResponseCache, RetryBudget,
+                            RetryPolicy, SSEPetStoreMCPClient, TokenBucket, ValidatorStore, _next_page, httpx,
+                            iter_json_array)
+
+def reference_route(table: List[Tuple[str, List[Tuple[str, ...]]]], prompt: str) -> Tuple[str, Optional[int]]:
+    """Unoptimised routing: a rule matches when every group has a keyword substring in the prompt"""
+    text = prompt.lower()
+    number = re.search(r"\d+", text)
+    pet_id = int(number.group()) if number else None
+    for intent, groups in table:
+        if all(any(pet_id is not None if keyword == IntentRouter.PET_ID else keyword.lower() in text
+                   for keyword in group)
+               for group in groups):
+            return intent, pet_id
+    return "general", pet_id
+
+class IntentRouterTest(unittest.TestCase):
+    ORCHESTRATORS = (pet_store_demo.AIOrchestrator, pet_store_demo_mock.AIOrchestrator)
+    
+    def test_predefined_prompts(self):
+        router = IntentRouter(pet_store_demo.AIOrchestrator.ROUTING_TABLE)
+        self.assertEqual(router.route("Show me all pets in the store"), ("all_pets", None))
+        self.assertEqual(router.route("Find me pet with ID 1"), ("pet_by_id", 1))
+        self.assertEqual(router.route("Tell me about pet number 42"), ("pet_by_id", 42))
+        self.assertEqual(router.route("Which pets are currently PENDING adoption?"), ("pending", None))
+        self.assertEqual(router.route("Hello there!"), ("general", None))
+    
+    def test_prefix_keywords_share_a_position(self):
+        # "pets" and "pet" start at the same position; the longer match must imply the shorter
+        router = IntentRouter([("a", [("pet",)]), ("b", [("pets",)])])
+        self.assertEqual(router.route("pets"), ("a", None))
+        router = IntentRouter([("b", [("pets",)]), ("a", [("pet",)])])
+        self.assertEqual(router.route("pets"), ("b", None))
+        self.assertEqual(router.route("pet store"), ("a", None))
+    
+    def test_overlapping_keywords(self):
+        router = IntentRouter([("x", [("all pets",), ("pets in",)]), ("y", [("set",)])])
+        self.assertEqual(router.route("all pets in stock"), ("x", None))
+        self.assertEqual(router.route("a petset"), ("y", None))
+    
+    def test_first_number_is_the_pet_id(self):
+        router = IntentRouter(pet_store_demo.AIOrchestrator.ROUTING_TABLE)
+        self.assertEqual(router.route("pet 7 or 8"), ("pet_by_id", 7))
+        self.assertEqual(router.route("id007"), ("general", 7))
+    
+    def test_matches_reference_on_random_prompts(self):
+        rng = random.Random(42)
+        words = ["all", "pets", "pet", "list", "id", "pending", "available", "adoption", "sold",
+                 "dog", "dogs", "cat", "catalog", "show", "me", "42", "7", "ALL PETS", "Pet", "petid"]
+        for orchestrator in self.ORCHESTRATORS:
+            router, table = orchestrator.ROUTER, orchestrator.ROUTING_TABLE
+            for _ in range(2000):
+                prompt = rng.choice(("", " ")).join(rng.choice(words) for _ in range(rng.randint(0, 6)))
+                self.assertEqual(router.route(prompt), reference_route(table, prompt), prompt)
+    
+    def test_mock_router_adds_dogs_and_cats(self):
+        router = pet_store_demo_mock.AIOrchestrator.ROUTER
+        self.assertEqual(router.route("What cats do you have?"), ("cats", None))
+        self.assertEqual(router.route("Any dogs?"), ("dogs", None))
+        # Earlier rules keep their priority
+        self.assertEqual(router.route("List available dogs"), ("available", None))
+        self.assertEqual(pet_store_demo.AIOrchestrator.ROUTER.route("Any dogs?"), ("general", None))
+
+class OrchestratorTest(unittest.TestCase):
+    
+    def setUp(self):
+        self.client = pet_store_demo_mock.MockPetStoreMCPClient("mock://pets")
+        self.orchestrator = pet_store_demo_mock.AIOrchestrator(self.client)
+    
+    def test_list_intents_map_to_backend_calls(self):
+        calls = {intent: self.orchestrator.backend_call(intent) for intent in ("all_pets", "sold", "dogs", "cats")}
+        self.assertEqual(calls, {"all_pets": ("get_pets",), "sold": ("search_pets_by_status", "sold"),
+                                 "dogs": ("search_pets", "available", "dogs"), "cats": ("search_pets", None, "cats")})
+        self.assertIsNone(self.orchestrator.backend_call("general"))
+    
+    def test_batch_answers_listings_from_one_get_pets(self):
+        prompts = ["Show me all pets", "What cats do you have?", "Show me all sold pets"]
+        routes, calls = self.orchestrator.plan_prompts(prompts)
+        self.assertEqual(calls, [("get_pets",)])
+        responses = self.orchestrator.process_prompts(prompts, plan=(routes, calls))
+        self.assertEqual(responses, [self.orchestrator.process_prompt(prompt) for prompt in prompts])
+    
+    def test_streamed_response_matches_rendered_one(self):
+        prompt = "What cats do you have?"
+        self.assertEqual("".join(self.orchestrator.stream_prompt(prompt)), self.orchestrator.process_prompt(prompt))
+    
+    def test_help_lists_the_subclass_examples(self):
+        response = self.orchestrator.process_prompt("Hello there!")
+        self.assertIn('🐱 Cats: "What cats do you have?"', response)
+        self.assertIn('Your request: "Hello there!"', response)
+    
+    def test_list_error_is_reported(self):
+        self.client.search_pets = lambda status, category: {"error": "backend down"}
+        self.assertEqual(self.orchestrator.process_prompt("Any dogs?"),
+                         "❌ Sorry, I couldn't fetch available dogs: backend down")
+
+class IterJsonArrayTest(unittest.TestCase):
+    
+    def test_every_split_point(self):
+        text = '[{"id": 1, "tags": [{"name": "a,]"}]}, 12, -3.5e2, true, null, "x\\"y", []]'
+        expected = json.loads(text)
+        for cut in range(len(text) + 1):
+            self.assertEqual(list(iter_json_array([text[:cut], text[cut:]])), expected, cut)
+    
+    def test_number_split_inside_fraction_or_exponent(self):
+        self.assertEqual(list(iter_json_array(["[1.", "5]"])), [1.5])
+        self.assertEqual(list(iter_json_array(["[1e", "3]"])), [1000.0])
+        self.assertEqual(list(iter_json_array(["[1", "2", ", -", "0.25 ", "]"])), [12, -0.25])
+    
+    def test_random_chunking(self):
+        rng = random.Random(7)
+        for _ in range(500):
+            document = [rng.choice([rng.randint(-10 ** 6, 10 ** 6), rng.random() * 10 ** rng.randint(-5, 5),
+                                    "s, ]", None, False, {"a": [1.5]}]) for _ in range(rng.randint(0, 8))]
+            text = json.dumps(document, separators=rng.choice([(",", ":"), (", ", ": ")]))
+            cuts = sorted(rng.sample(range(len(text) + 1), min(len(text), rng.randint(0, 6))))
+            chunks = [text[start:end] for start, end in zip([0] + cuts, cuts + [len(text)])]
+            self.assertEqual(list(iter_json_array(chunks)), document, chunks)
+    
+    def test_non_array_document_is_one_item(self):
+        self.assertEqual(list(iter_json_array(['{"error": ', '"nope"}'])), [{"error": "nope"}])
+        self.assertEqual(list(iter_json_array(["", "  "])), [])
+    
+    def test_truncated_array_raises(self):
+        with self.assertRaises(ValueError):
+            list(iter_json_array(['[{"id": 1}, {"id"']))
+
+class BenchmarkCompareTest(unittest.TestCase):
+    
+    @staticmethod
+    def results(p50_ms: float, count: int = 200) -> Dict[str, Any]:
+        stats = {"count": count, "p50_ms": p50_ms, "p95_ms": p50_ms}
+        return {"1000/mixed": {stage: dict(stats) for stage in pet_store_benchmark.STAGES}}
+    
+    def test_relative_regression_is_reported(self):
+        regressions = pet_store_benchmark.compare(self.results(1.5), self.results(1.0), tolerance=0.2)
+        self.assertEqual(len(regressions), 2 * len(pet_store_benchmark.STAGES))
+    
+    def test_small_absolute_slowdowns_are_ignored(self):
+        self.assertEqual(pet_store_benchmark.compare(self.results(0.012), self.results(0.005), tolerance=0.2), [])
+    
+    def test_stages_with_few_samples_are_ignored(self):
+        self.assertEqual(pet_store_benchmark.compare(self.results(3.0, count=5), self.results(1.0), tolerance=0.2), [])
+
+class PaginationTest(unittest.TestCase):
+    PETS = [{"id": pet_id, "status": "available" if pet_id % 2 else "sold"} for pet_id in range(1, 6)]
+    
+    def test_next_page(self):
+        params = {"page": 1, "limit": 2}
+        self.assertEqual(_next_page([1, 2], "https://gw/pets?cursor=x", params, 2), ("https://gw/pets?cursor=x", None))
+        self.assertEqual(_next_page([1, 2], None, params, 2), ("/pets", {"page": 2, "limit": 2}))
+        self.assertIsNone(_next_page([1], None, params, 2))
+        self.assertIsNone(_next_page([], None, params, 2))
+        # More items than requested: the server ignored limit and sent the whole listing
+        self.assertIsNone(_next_page([1, 2, 3], None, params, 2))
+    
+    def pager(self, page_size: int, respond: Callable[[Dict[str, Any]], Any]) -> Tuple[PetStoreMCPClient, List[Any]]:
+        client = PetStoreMCPClient("http://pets.invalid", page_size=page_size)
+        requests_made = []
+        
+        def get(endpoint: str, path: str, params: Dict[str, Any] = None) -> Any:
+            requests_made.append(params)
+            return respond(params)
+        
+        client._get = get
+        return client, requests_made
+    
+    def test_pages_until_a_short_page(self):
+        client, requests_made = self.pager(2, lambda params: self.PETS[(params["page"] - 1) * 2:params["page"] * 2])
+        self.assertEqual([len(page) for page in client.iter_pet_pages()], [2, 2, 1])
+        self.assertEqual(len(requests_made), 3)
+    
+    def test_server_ignoring_page_parameters(self):
+        client, requests_made = self.pager(2, lambda params: self.PETS)
+        self.assertEqual(client.get_pets(), self.PETS)
+        self.assertEqual(len(requests_made), 1)
+        # A catalog exactly one page long comes back again for page 2 and is dropped
+        client, requests_made = self.pager(5, lambda params: self.PETS)
+        with self.assertLogs(pet_store_demo.logger, "WARNING"):
+            self.assertEqual(client.get_pets(), self.PETS)
+        self.assertEqual(len(requests_made), 2)
+    
+    def test_cursor_pages_end_without_a_next_link(self):
+        pages = {None: {"value": self.PETS[:2], "nextLink": "https://gw/pets?cursor=2"},
+                 "https://gw/pets?cursor=2": {"value": self.PETS[2:4]}}
+        client = PetStoreMCPClient("http://pets.invalid", page_size=2)
+        client._get = lambda endpoint, path, params=None: pages[None if params else path]
+        self.assertEqual(client.get_pets(), self.PETS[:4])
+    
+    def test_repeated_page_is_logged(self):
+        client, _ = self.pager(5, lambda params: self.PETS)
+        with self.assertLogs(pet_store_demo.logger, "WARNING"):
+            client.get_pets()
+    
+    def test_server_ignoring_filters(self):
+        client, _ = self.pager(10, lambda params: self.PETS)
+        self.assertEqual([pet["id"] for pet in client.search_pets_by_status("sold")], [2, 4])
+
+class FakeClock:
+    """Stands in for time.monotonic so bucket arithmetic can be checked exactly"""
+    
+    def __init__(self):
+        self.now = 1000.0
+    
+    def __call__(self) -> float:
+        return self.now
+
+class ResponseCacheTest(unittest.TestCase):
+    
+    def setUp(self):
+        self.clock = FakeClock()
+        patcher = mock.patch.object(time, "monotonic", self.clock)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+    
+    def test_entries_expire_after_their_endpoint_ttl(self):
+        cache = ResponseCache(default_ttl=30, ttls={"/pets/{id}": 300, "/pets?status": 0})
+        cache.set("all", PETS, size=100, endpoint="/pets")
+        cache.set("pet 1", PETS[0], size=10, endpoint="/pets/{id}")
+        cache.set("sold", PETS[2:3], size=10, endpoint="/pets?status")
+        self.assertEqual(cache.get("all"), PETS)
+        self.clock.now += 30
+        self.assertIsNone(cache.get("all"))
+        self.assertEqual(cache.get("pet 1"), PETS[0])
+        self.assertIsNone(cache.get("sold"))
+        self.assertEqual(cache.stats(), {"hits": 2, "misses": 2, "hit_ratio": 0.5, "evictions": 0,
+                                         "entries": 1, "bytes": 10})
+    
+    def test_least_recently_used_entry_is_evicted_by_count(self):
+        cache = ResponseCache(max_entries=2)
+        cache.set("a", 1, size=1)
+        cache.set("b", 2, size=1)
+        cache.get("a")
+        cache.set("c", 3, size=1)
+        self.assertEqual([cache.get(key) for key in "abc"], [1, None, 3])
+        self.assertEqual(cache.evictions, 1)
+    
+    def test_least_recently_used_entry_is_evicted_by_bytes(self):
+        cache = ResponseCache(max_bytes=100)
+        cache.set("a", 1, size=60)
+        cache.set("b", 2, size=30)
+        cache.set("c", 3, size=40)
+        self.assertEqual([cache.get(key) for key in "abc"], [None, 2, 3])
+        self.assertEqual(cache.bytes, 70)
+        # A body larger than the whole cache is not stored at all
+        cache.set("d", 4, size=101)
+        self.assertIsNone(cache.get("d"))
+        self.assertEqual(cache.bytes, 70)
+    
+    def test_validator_store_bounds(self):
+        store = ValidatorStore(max_entries=2, max_bytes=100)
+        store.set("a", '"1"', None, 1, 10)
+        store.set("b", None, "Tue, 01 Jul 2025 00:00:00 GMT", 2, 10)
+        store.get("a")
+        store.set("c", '"3"', None, 3, 10)
+        self.assertIsNone(store.get("b"))
+        self.assertEqual(store.bytes, 20)
+        # Over both bounds: the count evicts "a", then the bytes evict "c"
+        store.set("d", '"4"', None, 4, 91)
+        self.assertEqual((store.get("a"), store.get("c")), (None, None))
+        self.assertEqual(store.bytes, 91)
+        self.assertEqual(ValidatorStore.conditional_headers(store.get("d")), {"If-None-Match": '"4"'})
+    
+    def test_not_modified_reuses_the_stored_body(self):
+        client = PetStoreMCPClient("http://pets.invalid", cache=ResponseCache(default_ttl=10))
+        sent: List[Dict[str, str]] = []
+        
+        def get(url, **kwargs):
+            headers = kwargs.get("headers") or {}
+            sent.append(headers)
+            response = requests.Response()
+            response.url = url
+            if headers.get("If-None-Match") == '"v1"':
+                response.status_code = 304
+                response._content = b""
+            else:
+                response.status_code = 200
+                response._content = json.dumps(PETS).encode()
+                response.headers["ETag"] = '"v1"'
+            return response
+        
+        client.session.get = get
+        self.assertEqual(client.get_pets(), PETS)
+        # Served from the cache until the TTL passes, then revalidated
+        self.assertEqual(client.get_pets(), PETS)
+        self.clock.now += 10
+        self.assertEqual(client.get_pets(), PETS)
+        self.assertEqual([headers.get("If-None-Match") for headers in sent], [None, '"v1"'])
+        self.assertEqual(client.validators.not_modified, 1)
+        self.assertEqual(client.get_pets(), PETS)
+        self.assertEqual(len(sent), 2)
+
+class RateLimitTest(unittest.TestCase):
+    
+    def setUp(self):
+        self.clock = FakeClock()
+        patcher = mock.patch.object(time, "monotonic", self.clock)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+    
+    def test_token_bucket_burst_then_rate(self):
+        bucket = TokenBucket(rate=2.0, capacity=2)
+        self.assertEqual([bucket.reserve() for _ in range(4)], [0.0, 0.0, 0.5, 1.0])
+        self.clock.now += 1.5
+        self.assertAlmostEqual(bucket.reserve(), 0.0)
+    
+    def test_unlimited_bucket_never_waits(self):
+        bucket = TokenBucket()
+        self.assertEqual([bucket.reserve() for _ in range(100)], [0.0] * 100)
+    
+    def test_pause_and_set_rate(self):
+        bucket = TokenBucket(rate=10.0)
+        bucket.pause(3)
+        self.assertAlmostEqual(bucket.reserve(), 3.1)
+        # The token taken during the pause is still owed at the new rate
+        bucket.set_rate(1.0)
+        self.clock.now += 3.1
+        self.assertAlmostEqual(bucket.reserve(), 1.9)
+    
+    def test_parse_headers(self):
+        parse = RateLimiter.parse_headers
+        self.assertEqual(parse({"X-RateLimit-Limit": "100", "X-RateLimit-Remaining": "40", "X-RateLimit-Reset": "20"}),
+                         (100.0, 40.0, 20.0, None))
+        self.assertEqual(parse({"RateLimit-Policy": "60;w=30", "RateLimit-Limit": "5"}), (60.0, None, None, 30.0))
+        with mock.patch.object(time, "time", return_value=1_700_000_000):
+            self.assertEqual(parse({"RateLimit-Reset": "1700000012"})[2], 12.0)
+        self.assertEqual(parse({}), (None, None, None, None))
+    
+    def test_update_follows_remaining_quota(self):
+        limiter = RateLimiter(safety=0.5)
+        limiter.update(200, {"RateLimit-Remaining": "50", "RateLimit-Reset": "10"})
+        self.assertAlmostEqual(limiter.bucket.rate, 2.5)
+        capped = RateLimiter(rate=1.0)
+        capped.update(200, {"RateLimit-Remaining": "50", "RateLimit-Reset": "10"})
+        self.assertEqual(capped.bucket.rate, 1.0)
+    
+    def test_update_keeps_the_configured_burst(self):
+        limiter = RateLimiter(rate=10.0, burst=20)
+        limiter.update(200, {"RateLimit-Remaining": "50", "RateLimit-Reset": "10"})
+        self.assertAlmostEqual(limiter.bucket.rate, 4.5)
+        self.assertEqual(limiter.bucket.capacity, 20)
+        self.clock.now += 10
+        self.assertEqual([limiter.reserve("/pets") for _ in range(20)], [0.0] * 20)
+        self.assertGreater(limiter.reserve("/pets"), 0.0)
+    
+    def test_exhausted_quota_only_pauses_until_reset(self):
+        limiter = RateLimiter()
+        limiter.update(200, {"RateLimit-Remaining": "0", "RateLimit-Reset": "1"})
+        self.assertIsNone(limiter.bucket.rate)
+        self.assertAlmostEqual(limiter.reserve("/pets"), 1.0)
+        limiter = RateLimiter(safety=1.0)
+        limiter.update(200, {"RateLimit-Remaining": "0", "RateLimit-Reset": "1", "RateLimit-Policy": "100;w=10"})
+        self.assertEqual(limiter.bucket.rate, 10.0)
+        self.assertLess(limiter.reserve("/pets"), 1.2)
+    
+    def test_throttled_response_pauses_for_retry_after(self):
+        limiter = RateLimiter(rate=100.0)
+        limiter.update(429, {"Retry-After": "2"})
+        self.assertEqual(limiter.throttled, 1)
+        self.assertAlmostEqual(limiter.reserve("/pets"), 2.0, places=1)
+    
+    def test_endpoint_bucket(self):
+        limiter = RateLimiter(endpoint_rates={"/pets/{id}": 1.0})
+        self.assertEqual([limiter.reserve("/pets/{id}") for _ in range(3)], [0.0, 1.0, 2.0])
+        self.assertEqual(limiter.reserve("/pets"), 0.0)
+        self.assertEqual(limiter.delayed, 2)
+
+class RetryPolicyTest(unittest.TestCase):
+    
+    def test_parse_retry_after_seconds(self):
+        self.assertEqual(RetryPolicy.parse_retry_after("3"), 3.0)
+        self.assertEqual(RetryPolicy.parse_retry_after("-1"), 0.0)
+        self.assertIsNone(RetryPolicy.parse_retry_after(None))
+        self.assertIsNone(RetryPolicy.parse_retry_after("soon"))
+    
+    def test_parse_retry_after_http_date(self):
+        now = 1_700_000_000.0
+        with mock.patch.object(time, "time", return_value=now):
+            self.assertAlmostEqual(RetryPolicy.parse_retry_after(formatdate(now + 120, usegmt=True)), 120.0)
+            self.assertEqual(RetryPolicy.parse_retry_after(formatdate(now - 120, usegmt=True)), 0.0)
+    
+    def test_backoff_is_capped_exponential_jitter(self):
+        policy = RetryPolicy(base_delay=0.2, max_delay=1.0)
+        with mock.patch.object(random, "uniform", lambda low, high: high):
+            self.assertEqual([policy.backoff(attempt) for attempt in (1, 2, 3, 4)], [0.2, 0.4, 0.8, 1.0])
+    
+    def test_retry_after_replaces_backoff(self):
+        policy = RetryPolicy(max_retry_after=30)
+        self.assertEqual(policy.next_delay("GET", 1, 503, {"Retry-After": "5"}), 5.0)
+        self.assertIsNone(policy.next_delay("GET", 1, 429, {"Retry-After": "60"}))
+        self.assertEqual(policy.retries, 1)
+    
+    def test_only_retryable_failures_are_retried(self):
+        policy = RetryPolicy(max_attempts=3, base_delay=0.2)
+        self.assertIsNone(policy.next_delay("POST", 1))
+        self.assertIsNone(policy.next_delay("PATCH", 1, 503))
+        self.assertIsNone(policy.next_delay("GET", 1, 500))
+        self.assertIsNone(policy.next_delay("GET", 3, 502))
+        self.assertLessEqual(policy.next_delay("GET", 1, 502), 0.2)
+        self.assertLessEqual(policy.next_delay("get", 2), 0.4)
+        self.assertEqual(policy.retries, 2)
+    
+    def test_budget_exhaustion(self):
+        policy = RetryPolicy(max_attempts=5, budget=RetryBudget(ratio=0.5, min_tokens=1.0))
+        self.assertIsNotNone(policy.next_delay("GET", 1, 503))
+        self.assertIsNone(policy.next_delay("GET", 2, 503))
+        self.assertEqual((policy.retries, policy.budget_exhausted), (1, 1))
+        # Two more original requests pay for another retry
+        policy.budget.deposit()
+        policy.budget.deposit()
+        self.assertIsNotNone(policy.next_delay("GET", 1))
+        self.assertEqual((policy.retries, policy.budget_exhausted), (2, 1))
+
+class CircuitBreakerTest(unittest.TestCase):
+    
+    def setUp(self):
+        self.clock = FakeClock()
+        patcher = mock.patch.object(time, "monotonic", self.clock)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+    
+    def open_breaker(self) -> CircuitBreaker:
+        breaker = CircuitBreaker("/pets", failure_threshold=3, reset_timeout=30.0)
+        with self.assertLogs(pet_store_demo.logger, "WARNING"):
+            for _ in range(3):
+                self.assertTrue(breaker.allow())
+                breaker.record(False)
+        return breaker
+    
+    def test_opens_after_consecutive_failures(self):
+        breaker = CircuitBreaker("/pets", failure_threshold=3)
+        for success in (False, False, True, False, False):
+            breaker.allow()
+            breaker.record(success)
+        self.assertEqual(breaker.state, CircuitBreaker.CLOSED)
+        self.assertEqual(self.open_breaker().state, CircuitBreaker.OPEN)
+    
+    def test_open_circuit_fails_fast_until_the_reset_timeout(self):
+        breaker = self.open_breaker()
+        self.assertFalse(breaker.allow())
+        self.clock.now += 29.9
+        self.assertFalse(breaker.allow())
+        self.assertEqual(breaker.rejected, 2)
+        self.clock.now += 0.1
+        self.assertEqual(breaker.state, CircuitBreaker.HALF_OPEN)
+    
+    def test_half_open_trial_success_closes(self):
+        breaker = self.open_breaker()
+        self.clock.now += 30
+        self.assertTrue(breaker.allow())
+        # Only one trial call at a time
+        self.assertFalse(breaker.allow())
+        with self.assertLogs(pet_store_demo.logger, "INFO"):
+            breaker.record(True)
+        self.assertEqual(breaker.state, CircuitBreaker.CLOSED)
+        self.assertTrue(breaker.allow())
+    
+    def test_half_open_trial_failure_reopens(self):
+        breaker = self.open_breaker()
+        self.clock.now += 30
+        self.assertTrue(breaker.allow())
+        with self.assertLogs(pet_store_demo.logger, "WARNING"):
+            breaker.record(False)
+        self.assertEqual(breaker.state, CircuitBreaker.OPEN)
+        self.clock.now += 29
+        self.assertFalse(breaker.allow())
+    
+    def test_release_frees_the_trial_slot_without_an_outcome(self):
+        breaker = self.open_breaker()
+        self.clock.now += 30
+        self.assertTrue(breaker.allow())
+        breaker.release()
+        self.assertEqual(breaker.state, CircuitBreaker.HALF_OPEN)
+        self.assertTrue(breaker.allow())
+    
+    def test_interrupted_call_is_not_a_failure(self):
+        client = PetStoreMCPClient("http://pets.invalid", breakers=CircuitBreakers(failure_threshold=1))
+        breaker = client.breakers.get("/pets")
+        
+        def interrupted(*args, **kwargs):
+            raise KeyboardInterrupt
+        
+        client._request = interrupted
+        for _ in range(3):
+            with self.assertRaises(KeyboardInterrupt):
+                client._send("/pets", "http://pets.invalid/pets")
+        self.assertEqual(breaker.state, CircuitBreaker.CLOSED)
+
+class AdaptiveConcurrencyLimitTest(unittest.TestCase):
+    
+    @staticmethod
+    def run_window(limit: AdaptiveConcurrencyLimit, latency: float, success: bool = True, concurrent: bool = True):
+        """Complete one adjustment window of requests, all in flight together unless concurrent is False"""
+        count = max(limit.window, limit.limit)
+        if concurrent:
+            for _ in range(count):
+                limit.acquire()
+        for _ in range(count):
+            if not concurrent:
+                limit.acquire()
+            limit.release(latency, success)
+    
+    def test_aimd_grows_while_latency_is_stable(self):
+        limit = AdaptiveConcurrencyLimit(initial_limit=2, window=1, max_limit=4)
+        self.assertIsNone(limit.stats()["min_latency_ms"])
+        for expected in (3, 4, 4):
+            self.run_window(limit, 0.01)
+            self.assertEqual(limit.limit, expected)
+        self.assertAlmostEqual(limit.stats()["min_latency_ms"], 10.0)
+        self.assertEqual(limit.peak_limit, 4)
+    
+    def test_aimd_does_not_grow_an_unused_limit(self):
+        limit = AdaptiveConcurrencyLimit(initial_limit=4, window=1)
+        self.run_window(limit, 0.01, concurrent=False)
+        self.assertEqual(limit.limit, 4)
+    
+    def test_aimd_backs_off_on_errors_and_latency_rises(self):
+        limit = AdaptiveConcurrencyLimit(initial_limit=10, window=1, backoff_ratio=0.5, min_limit=2)
+        self.run_window(limit, 0.01)
+        self.assertEqual(limit.limit, 11)
+        self.run_window(limit, 0.01, success=False)
+        self.assertEqual(limit.limit, 5)
+        self.run_window(limit, 0.05)
+        self.assertEqual(limit.limit, 2)
+        self.run_window(limit, 0.05, success=False)
+        self.assertEqual(limit.limit, 2)
+    
+    def test_gradient_tracks_latency(self):
+        limit = AdaptiveConcurrencyLimit(algorithm="gradient", initial_limit=10, window=1)
+        for _ in range(3):
+            self.run_window(limit, 0.01)
+        self.assertGreater(limit.limit, 10)
+        grown = limit.limit
+        for _ in range(5):
+            self.run_window(limit, 0.1)
+        self.assertLess(limit.limit, grown)
+    
+    def test_unknown_algorithm(self):
+        with self.assertRaises(ValueError):
+            AdaptiveConcurrencyLimit(algorithm="vegas")
+    
+    def test_threads_wait_for_a_free_slot(self):
+        limit = AdaptiveConcurrencyLimit(initial_limit=1, min_limit=1)
+        limit.acquire()
+        acquired = threading.Event()
+        waiter = threading.Thread(target=lambda: (limit.acquire(), acquired.set()))
+        waiter.start()
+        self.assertFalse(acquired.wait(0.05))
+        limit.release(0.01, True)
+        self.assertTrue(acquired.wait(1))
+        waiter.join()
+        self.assertEqual(limit.inflight, 1)
+    
+    def test_cancelled_async_waiter_passes_its_wake_up_on(self):
+        async def scenario():
+            limit = AdaptiveConcurrencyLimit(initial_limit=1, min_limit=1)
+            await limit.acquire_async()
+            first = asyncio.ensure_future(limit.acquire_async())
+            second = asyncio.ensure_future(limit.acquire_async())
+            await asyncio.sleep(0)
+            limit.release(0.01, True)
+            first.cancel()
+            await asyncio.wait_for(second, 1)
+            return limit.inflight
+        
+        self.assertEqual(asyncio.run(scenario()), 1)
+
+PETS = [
+    {"id": 1, "name": "Buddy", "status": "available", "category": {"id": 1, "name": "Dogs"}},
+    {"id": 2, "name": "Whiskers", "status": "available", "category": {"id": 2, "name": "Cats"}},
+    {"id": 3, "name": "Max", "status": "sold", "category": {"id": 1, "name": "Dogs"}},
+    {"id": 4, "name": "Luna", "status": "pending", "category": {"id": 2, "name": "Cats"}}
+]
+
+class FakePetAPI:
+    """REST Pet Store behind httpx.MockTransport that records requests and peak concurrency
+    
+    Listings honour ``page``/``limit`` and ``status`` but ignore ``category``, like a gateway
+    that does not support that filter.
+    """
+    
+    def __init__(self, delay: float = 0.01):
+        self.delay = delay
+        # Per-request delays, used in order before falling back to ``delay``
+        self.delays: List[float] = []
+        self.requests: List[str] = []
+        self.in_flight = 0
+        self.peak = 0
+        self.transport = httpx.MockTransport(self.handle)
+    
+    async def handle(self, request: "httpx.Request") -> "httpx.Response":
+        self.requests.append(f"{request.url.path}?{request.url.query.decode()}".rstrip("?"))
+        self.in_flight += 1
+        self.peak = max(self.peak, self.in_flight)
+        try:
+            await asyncio.sleep(self.delays.pop(0) if self.delays else self.delay)
+        finally:
+            self.in_flight -= 1
+        path, params = request.url.path, request.url.params
+        if path.startswith("/pets/"):
+            pet = next((pet for pet in PETS if pet["id"] == int(path.rpartition("/")[2])), None)
+            return httpx.Response(200, json=pet) if pet else httpx.Response(404, json={"message": "Pet not found"})
+        pets = [pet for pet in PETS if pet["status"] == params["status"]] if "status" in params else PETS
+        if "page" in params:
+            limit = int(params["limit"])
+            start = (int(params["page"]) - 1) * limit
+            pets = pets[start:start + limit]
+        return httpx.Response(200, json=pets)
+
+@unittest.skipIf(httpx is None, "httpx is not installed")
+class AsyncClientTest(unittest.TestCase):
+    
+    def run_client(self, api: FakePetAPI, scenario: Callable[[Any], Any]) -> Any:
+        async def main():
+            async with AsyncPetStoreMCPClient("http://pets.invalid", transport=api.transport) as client:
+                return await scenario(client)
+        
+        return asyncio.run(main())
+    
+    def test_concurrent_calls_share_the_pool(self):
+        api = FakePetAPI()
+        
+        async def scenario(client):
+            return await asyncio.gather(client.get_pets(), client.search_pets_by_status("available"),
+                                        *(client.get_pet_by_id(pet["id"]) for pet in PETS))
+        
+        everything, available, *by_id = self.run_client(api, scenario)
+        self.assertEqual(everything, PETS)
+        self.assertEqual([pet["name"] for pet in available], ["Buddy", "Whiskers"])
+        self.assertEqual(by_id, PETS)
+        self.assertEqual(api.peak, len(PETS) + 2)
+    
+    def test_identical_calls_are_coalesced(self):
+        api = FakePetAPI()
+        
+        async def scenario(client):
+            return await asyncio.gather(*(client.get_pet_by_id(1) for _ in range(5)))
+        
+        self.assertEqual([pet["name"] for pet in self.run_client(api, scenario)], ["Buddy"] * 5)
+        self.assertEqual(api.requests, ["/pets/1"])
+    
+    def test_missing_pet_is_an_error(self):
+        async def scenario(client):
+            return await client.get_pet_by_id(99)
+        
+        with self.assertLogs(pet_store_demo.logger, "ERROR"):
+            self.assertIn("404", self.run_client(FakePetAPI(), scenario)["error"])
+    
+    def test_search_pets_filters_what_the_server_ignores(self):
+        api = FakePetAPI()
+        
+        async def scenario(client):
+            return await client.search_pets(status="available", category="Cats")
+        
+        self.assertEqual([pet["name"] for pet in self.run_client(api, scenario)], ["Whiskers"])
+        self.assertEqual(api.requests, ["/pets?status=available&category=Cats"])
+    
+    def test_iter_pet_pages(self):
+        api = FakePetAPI()
+        
+        async def scenario(client):
+            return [page async for page in client.iter_pet_pages(page_size=2, category="Cats")]
+        
+        pages = self.run_client(api, scenario)
+        self.assertEqual([[pet["name"] for pet in page] for page in pages], [["Whiskers"], ["Luna"]])
+        self.assertEqual(api.requests, ["/pets?page=1&limit=2&category=Cats", "/pets?page=2&limit=2&category=Cats",
+                                        "/pets?page=3&limit=2&category=Cats"])
+
+class HedgePolicyTest(unittest.TestCase):
+    
+    def test_delay_is_the_observed_percentile(self):
+        policy = HedgePolicy(min_samples=20)
+        for ms in range(1, 20):
+            policy.observe("/pets", ms / 1000)
+        self.assertIsNone(policy.delay_for("/pets"))
+        for ms in range(20, 101):
+            policy.observe("/pets", ms / 1000)
+        self.assertAlmostEqual(policy.delay_for("/pets"), 0.096)
+        self.assertIsNone(policy.delay_for("/pets/{id}"))
+    
+    def test_delay_floor_and_fixed_delay(self):
+        policy = HedgePolicy(min_samples=1, min_delay=0.005)
+        policy.observe("/pets", 0.0001)
+        self.assertEqual(policy.delay_for("/pets"), 0.005)
+        self.assertEqual(HedgePolicy(delay=0.25).delay_for("/pets"), 0.25)
+    
+    def test_hedges_are_limited_by_the_rate_budget(self):
+        policy = HedgePolicy(max_rate=0.25)
+        self.assertTrue(policy.try_hedge())
+        self.assertFalse(policy.try_hedge())
+        for _ in range(4):
+            policy.budget.deposit()
+        self.assertTrue(policy.try_hedge())
+        self.assertFalse(policy.try_hedge())
+        self.assertEqual(policy.hedged, 2)
+
+@unittest.skipIf(httpx is None, "httpx is not installed")
+class AsyncHedgingTest(unittest.TestCase):
+    
+    def test_backup_wins_and_the_primary_is_cancelled(self):
+        api = FakePetAPI()
+        api.delays = [1.0, 0.01]
+        policy = HedgePolicy(delay=0.05)
+        
+        async def main():
+            async with AsyncPetStoreMCPClient("http://pets.invalid", transport=api.transport,
+                                              hedge_policy=policy) as client:
+                pet = await client.get_pet_by_id(1)
+                await asyncio.sleep(0)
+                return pet, api.in_flight
+        
+        started = time.perf_counter()
+        pet, in_flight = asyncio.run(main())
+        self.assertEqual(pet["name"], "Buddy")
+        self.assertLess(time.perf_counter() - started, 0.5)
+        self.assertEqual((policy.hedged, policy.backup_wins, in_flight), (1, 1, 0))
+        self.assertEqual(api.requests, ["/pets/1", "/pets/1"])
+    
+    def test_cancelled_caller_cancels_the_hedged_copies(self):
+        api = FakePetAPI()
+        api.delays = [1.0, 1.0, 1.0]
+        
+        async def main():
+            async with AsyncPetStoreMCPClient("http://pets.invalid", transport=api.transport,
+                                              hedge_policy=HedgePolicy(delay=0.05)) as client:
+                in_flight = []
+                # Cancelled while waiting for the primary, then while both copies are in flight
+                for wait in (0.01, 0.1):
+                    call = asyncio.ensure_future(client._request("/pets/{id}", "http://pets.invalid/pets/1"))
+                    await asyncio.sleep(wait)
+                    call.cancel()
+                    await asyncio.gather(call, return_exceptions=True)
+                    await asyncio.sleep(0)
+                    in_flight.append(api.in_flight)
+                return in_flight, len(asyncio.all_tasks())
+        
+        self.assertEqual(asyncio.run(main()), ([0, 0], 1))
+        self.assertEqual(len(api.requests), 3)
+
+class FakeMCPServer:
+    """MCP server behind httpx.MockTransport: an SSE event stream plus a JSON-RPC message endpoint
+    
+    Requests are answered on the stream unless their method is listed in ``drop`` (each entry
+    swallows one request) or ``hold`` is set, in which case replies wait in ``held``.
+    """
+    
+    def __init__(self, endpoint_event: bool = True):
+        self.endpoint_event = endpoint_event
+        self.events: asyncio.Queue = asyncio.Queue()
+        self.received: List[Dict[str, Any]] = []
+        self.urls: List[str] = []
+        self.drop: List[str] = []
+        self.hold = False
+        self.held: List[Dict[str, Any]] = []
+        self.transport = httpx.MockTransport(self.handle)
+    
+    async def handle(self, request: "httpx.Request") -> "httpx.Response":
+        if request.method == "GET":
+            return httpx.Response(200, headers={"Content-Type": "text/event-stream"}, content=self.stream())
+        message = json.loads(request.content)
+        self.received.append(message)
+        self.urls.append(str(request.url))
+        if "id" in message and "method" in message:
+            if message["method"] in self.drop:
+                self.drop.remove(message["method"])
+            elif self.hold and message["method"] == "tools/call":
+                self.held.append(self.reply(message))
+            else:
+                self.push(self.reply(message))
+        return httpx.Response(202)
+    
+    async def stream(self):
+        if self.endpoint_event:
+            yield b": keep-alive\n\nevent: endpoint\ndata: /pet-shop-mcp/messages?sessionId=1\n\n"
+        while True:
+            item = await self.events.get()
+            if isinstance(item, Exception):
+                raise item
+            yield f"event: message\ndata: {json.dumps(item)}\n\n".encode()
+    
+    def push(self, message: Any) -> None:
+        self.events.put_nowait(message)
+    
+    @staticmethod
+    def reply(message: Dict[str, Any]) -> Dict[str, Any]:
+        if message["method"] == "initialize":
+            return {"jsonrpc": "2.0", "id": message["id"], "result": {"serverInfo": {"name": "fake"}}}
+        name, arguments = message["params"]["name"], message["params"]["arguments"]
+        if name == "getPetById":
+            data = next((pet for pet in PETS if pet["id"] == arguments["petId"]), None)
+        elif name == "findPetsByStatus":
+            data = [pet for pet in PETS if pet["status"] == arguments["status"]]
+        else:
+            data = PETS
+        content = [{"type": "text", "text": json.dumps(data)}]
+        return {"jsonrpc": "2.0", "id": message["id"], "result": {"content": content, "isError": data is None}}
+    
+    def methods(self) -> List[str]:
+        return [message.get("method", "response") for message in self.received]
+
+@unittest.skipIf(httpx is None, "httpx is not installed")
+class SSESessionTest(unittest.TestCase):
+    
+    def run_client(self, server: FakeMCPServer, scenario: Callable[[Any], Any], timeout: float = 1.0) -> Any:
+        async def main():
+            client = SSEPetStoreMCPClient("http://gateway.invalid/pet-shop-mcp", timeout=timeout,
+                                          transport=server.transport)
+            try:
+                return await scenario(client)
+            finally:
+                await client.aclose()
+        
+        return asyncio.run(main())
+    
+    def test_failed_handshake_is_retried_on_the_next_call(self):
+        server = FakeMCPServer()
+        server.drop.append("initialize")
+        
+        async def scenario(client):
+            first = await client.get_pet_by_id(1)
+            self.assertFalse(client.session.connected)
+            return first, await client.get_pet_by_id(1)
+        
+        with self.assertLogs(pet_store_demo.logger, "ERROR"):
+            first, second = self.run_client(server, scenario, timeout=0.2)
+        self.assertIn("initialize", first["error"])
+        self.assertEqual(second["name"], "Buddy")
+        self.assertEqual(server.methods(), ["initialize", "initialize", "notifications/initialized", "tools/call"])
+    
+    def test_missing_endpoint_event(self):
+        server = FakeMCPServer(endpoint_event=False)
+        
+        async def scenario(client):
+            return await client.get_pets()
+        
+        with self.assertLogs(pet_store_demo.logger, "ERROR"):
+            self.assertIn("endpoint event", self.run_client(server, scenario, timeout=0.2)["error"])
+        self.assertEqual(server.received, [])
+    
+    def test_messages_go_to_the_advertised_endpoint(self):
+        server = FakeMCPServer()
+        
+        async def scenario(client):
+            return await client.get_pet_by_id(2)
+        
+        self.assertEqual(self.run_client(server, scenario)["name"], "Whiskers")
+        self.assertEqual(server.methods(), ["initialize", "notifications/initialized", "tools/call"])
+        self.assertEqual(set(server.urls), {"http://gateway.invalid/pet-shop-mcp/messages?sessionId=1"})
+    
+    def test_out_of_order_responses_are_matched_by_id(self):
+        server = FakeMCPServer()
+        server.hold = True
+        
+        async def scenario(client):
+            calls = asyncio.gather(*(client.get_pet_by_id(pet["id"]) for pet in PETS))
+            while len(server.held) < len(PETS):
+                await asyncio.sleep(0.01)
+            for reply in reversed(server.held):
+                server.push(reply)
+            return await calls
+        
+        results = self.run_client(server, scenario)
+        self.assertEqual([pet["name"] for pet in results], [pet["name"] for pet in PETS])
+    
+    def test_ping_is_answered(self):
+        server = FakeMCPServer()
+        
+        async def scenario(client):
+            await client.connect()
+            server.push({"jsonrpc": "2.0", "id": "ping-1", "method": "ping"})
+            while len(server.received) < 3:
+                await asyncio.sleep(0.01)
+        
+        self.run_client(server, scenario)
+        self.assertEqual(server.received[-1], {"jsonrpc": "2.0", "id": "ping-1", "result": {}})
+    
+    def test_stream_failure_fails_pending_calls(self):
+        server = FakeMCPServer()
+        server.hold = True
+        
+        async def scenario(client):
+            calls = asyncio.gather(client.get_pet_by_id(1), client.get_pets())
+            while len(server.held) < 2:
+                await asyncio.sleep(0.01)
+            server.push(RuntimeError("connection reset"))
+            started = time.monotonic()
+            results = await calls
+            return results, time.monotonic() - started, client.session.connected
+        
+        with self.assertLogs(pet_store_demo.logger, "ERROR"):
+            results, elapsed, connected = self.run_client(server, scenario, timeout=5.0)
+        self.assertTrue(all("connection reset" in result["error"] for result in results))
+        # Failed by the stream, not by the 5 s response timeout
+        self.assertLess(elapsed, 1.0)
+        self.assertFalse(connected)
+
+if __name__ == "__main__":
+    unittest.main()
\ No newline at end of file